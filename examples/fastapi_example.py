@@ -21,6 +21,8 @@ Test:
     curl -H "X-Agent-ID: admin-001" -X POST http://localhost:8000/refunds
 """
 
+from typing import Optional
+
 from fastapi import FastAPI, Depends, Request, HTTPException
 from pydantic import BaseModel
 
@@ -76,11 +78,34 @@ class EmailRequest(BaseModel):
     body: str
 
 
+# Declaring response models lets FastAPI serialize straight to JSON bytes
+# via pydantic-core instead of going through jsonable_encoder + json.dumps.
+
+class WeatherResponse(BaseModel):
+    city: str
+    weather: str
+    temperature: int
+    agent: str
+
+
+class RefundResponse(BaseModel):
+    status: str
+    order_id: str
+    amount: float
+    agent: str
+
+
+class MultiActionResponse(BaseModel):
+    status: str
+    results: dict
+    agent: Optional[str] = None
+
+
 # =============================================================================
 # Option 1: Using Depends(require_scope(...))
 # =============================================================================
 
-@app.get("/weather/{city}")
+@app.get("/weather/{city}", response_model=WeatherResponse)
 async def get_weather(
     city: str,
     agent: Agent = Depends(require_scope("read:weather"))
@@ -94,7 +119,7 @@ async def get_weather(
     }
 
 
-@app.post("/refunds")
+@app.post("/refunds", response_model=RefundResponse)
 async def process_refund(
     refund: RefundRequest,
     agent: Agent = Depends(require_scope("write:refunds"))
@@ -140,7 +165,7 @@ async def delete_record(record_id: str, request: Request):
 # Option 3: Using AgentContext for fine-grained control
 # =============================================================================
 
-@app.post("/multi-action")
+@app.post("/multi-action", response_model=MultiActionResponse)
 async def multi_action(request: Request):
     """
     Endpoint that requires multiple scopes for different operations.
@@ -149,12 +174,9 @@ async def multi_action(request: Request):
     ctx = AgentContext(request)
     results = {}
     
-    # Check read permission
-    with ctx.require("read:data"):
+    # Check read and write permissions together (one check, one log record)
+    with ctx.require_all(["read:data", "write:logs"]):
         results["data"] = {"fetched": True, "count": 42}
-    
-    # Check write permission
-    with ctx.require("write:logs"):
         results["logged"] = True
     
     return {
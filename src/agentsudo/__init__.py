@@ -2,7 +2,10 @@ from .core import Agent, get_current_agent
 from .guard import sudo, PermissionDeniedError
 from .cloud import configure_cloud, send_telemetry, disable_cloud, get_cloud_config
 from .guardrails import Guardrails, GuardrailViolation, guardrail, check_guardrails
-from .slack import SlackApproval, SlackApprovalTimeout, create_slack_approval
+
+# Slack approvals pull in asyncio and the HTTP stack, so the module is
+# imported on first use of one of its names (PEP 562), not with the package
+_SLACK_NAMES = ("SlackApproval", "SlackApprovalTimeout", "create_slack_approval")
 
 # FastAPI adapter (import only when needed)
 # Usage: from agentsudo.adapters.fastapi import AgentSudoMiddleware, require_scope
@@ -24,3 +27,16 @@ __all__ = [
     "SlackApprovalTimeout",
     "create_slack_approval",
 ]
+
+
+def __getattr__(name):
+    if name in _SLACK_NAMES:
+        from . import slack
+        value = getattr(slack, name)
+        globals()[name] = value  # Later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
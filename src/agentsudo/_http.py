@@ -0,0 +1,201 @@
+"""
+Shared HTTP plumbing for cloud telemetry and Slack approvals.
+
+Creating an SSL context loads and parses the CA bundle, so one context is
+built per process and shared. KeepAliveConnection keeps a single
+HTTP/1.1 connection open across requests, so repeated calls to the same
+host pay the TCP and TLS handshake once.
+
+Proxies are taken from the environment (HTTPS_PROXY, HTTP_PROXY, NO_PROXY)
+as urlopen does: HTTPS requests are tunnelled through the proxy with
+CONNECT, plain HTTP requests are sent to it with absolute URLs.
+"""
+
+import base64
+import http.client
+import select
+import ssl
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import SplitResult, unquote, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+_ssl_context: Optional[ssl.SSLContext] = None
+_ssl_context_lock = threading.Lock()
+
+# Per-thread connections keyed by (scheme, host:port), see connection_for()
+_local = threading.local()
+
+
+def _create_ssl_context() -> ssl.SSLContext:
+    # Try to use certifi for SSL certificates if available (probed on the
+    # first HTTPS connection, not at import)
+    try:
+        import certifi
+        cafile: Optional[str] = certifi.where()
+    except ImportError:
+        cafile = None
+    # Without certifi, verify against the system CA store as urlopen does
+    return ssl.create_default_context(cafile=cafile)
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Return the process-wide SSL context, creating it on first use."""
+    global _ssl_context
+    if _ssl_context is None:
+        with _ssl_context_lock:
+            if _ssl_context is None:
+                _ssl_context = _create_ssl_context()
+    return _ssl_context
+
+
+# Safe to resend when the connection drops after the request went out
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+
+def _is_dropped(sock) -> bool:
+    """True if an idle socket is readable, i.e. the server closed it."""
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[SplitResult]:
+    """The proxy configured for this scheme and host, or None."""
+    proxy = getproxies().get(scheme)
+    if not proxy or proxy_bypass(host):
+        return None
+    if "://" not in proxy:
+        proxy = "http://" + proxy
+    return urlsplit(proxy)
+
+
+def _proxy_headers(proxy: SplitResult) -> Dict[str, str]:
+    """Proxy-Authorization for credentials in the proxy URL, if any."""
+    if proxy.username is None:
+        return {}
+    credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode()).decode("ascii")}
+
+
+class KeepAliveConnection:
+    """
+    A persistent connection to one host, safe to share between threads.
+    
+    Example:
+        conn = KeepAliveConnection("https://agentsudo.dev")
+        status, body = conn.request("POST", "/api/events", data, headers)
+    """
+    
+    def __init__(self, url: str, timeout: float = 10.0):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+        # Set by _connect when plain HTTP goes through a proxy
+        self._origin = ""
+        self._extra_headers: Dict[str, str] = {}
+    
+    def _connect(self) -> http.client.HTTPConnection:
+        proxy = _proxy_for(self.scheme, self.host)
+        self._origin = ""
+        self._extra_headers = {}
+        if self.scheme == "http":
+            if proxy is None:
+                return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            # The proxy forwards requests for absolute URLs
+            self._origin = f"http://{self.host}" + (f":{self.port}" if self.port else "")
+            self._extra_headers = _proxy_headers(proxy)
+            return http.client.HTTPConnection(proxy.hostname, proxy.port, timeout=self.timeout)
+        if proxy is None:
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=get_ssl_context()
+            )
+        conn = http.client.HTTPSConnection(
+            proxy.hostname, proxy.port, timeout=self.timeout, context=get_ssl_context()
+        )
+        # TLS to the target host runs inside the CONNECT tunnel
+        conn.set_tunnel(self.host, self.port, headers=_proxy_headers(proxy))
+        return conn
+    
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        Send a request and return (status, response body). timeout overrides
+        the connection's socket timeout for this request only (e.g. for
+        long-poll requests the server holds open).
+        """
+        with self._lock:
+            # Drop an idle socket the server has already closed, so a POST
+            # isn't sent into it and left unanswered
+            if self._conn is not None and self._conn.sock is not None and _is_dropped(self._conn.sock):
+                self._close()
+            for attempt in range(2):
+                reused = self._conn is not None and self._conn.sock is not None
+                if self._conn is None:
+                    self._conn = self._connect()
+                self._set_timeout(self.timeout if timeout is None else timeout)
+                sent = False
+                try:
+                    if self._extra_headers:
+                        headers = {**(headers or {}), **self._extra_headers}
+                    self._conn.request(method, self._origin + path, body=body, headers=headers or {})
+                    sent = True
+                    response = self._conn.getresponse()
+                    # Read fully so the socket can be reused
+                    return response.status, response.read()
+                except (http.client.BadStatusLine, ConnectionError):
+                    self._close()
+                    # Retry once on a reused keep-alive socket the server
+                    # closed, unless the request may already have been
+                    # processed: a sent POST (an approval, a Slack
+                    # message) must not be sent twice
+                    if attempt or not reused or (sent and method not in _IDEMPOTENT_METHODS):
+                        raise
+                except Exception:
+                    self._close()
+                    raise
+    
+    def _set_timeout(self, timeout: float):
+        self._conn.timeout = timeout
+        if self._conn.sock is not None:
+            self._conn.sock.settimeout(timeout)
+    
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def close(self):
+        """Close the underlying connection; the next request reopens it."""
+        with self._lock:
+            self._close()
+
+
+def connection_for(url: str) -> KeepAliveConnection:
+    """
+    Return this thread's keep-alive connection for the URL's origin.
+    
+    Connections are per thread rather than per process so that a request
+    the server holds open (a long poll) never blocks other threads talking
+    to the same host.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = KeepAliveConnection(url)
+    return conn
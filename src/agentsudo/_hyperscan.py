@@ -0,0 +1,81 @@
+"""
+Hyperscan prefilter for the built-in prompt injection patterns.
+
+Hyperscan is optional (pip install agentsudo[hyperscan]): it checks all
+the patterns in a single DFA pass over the input, which on clean text is
+far cheaper than one re search per pattern. It is only used to clear
+inputs. A reported match is confirmed with re, which also picks the
+rejection reason, so results are the same with or without it.
+
+Hyperscan's case folding and character classes differ from re's outside
+ASCII, so only ASCII inputs are screened. Everything else goes straight
+to re.
+"""
+
+import re
+import threading
+from typing import Callable, Optional, Sequence
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# On ASCII text re's \s also matches the \x1c-\x1f separators, which
+# Hyperscan's \s does not, so it is spelled out in the compiled patterns
+_ASCII_SPACE = r"[\t\n\x0b\x0c\r\x1c-\x1f ]"
+
+
+def _stop(*args) -> bool:
+    # Any match decides the screen: returning True stops the scan
+    return True
+
+
+def compile_screen(patterns: Sequence["re.Pattern[str]"]) -> Optional[Callable[[str], bool]]:
+    """
+    Build a function that returns False when a text cannot match any of
+    the patterns, and True when it may (a match, or a non-ASCII text).
+
+    Returns None if Hyperscan is not installed or cannot compile the
+    patterns; callers then search with re alone. Only plain patterns with
+    an optional leading '(?i)' are accepted.
+    """
+    if hyperscan is None:
+        return None
+
+    expressions, flags = [], []
+    for pattern in patterns:
+        source = pattern.pattern
+        flag = hyperscan.HS_FLAG_SINGLEMATCH
+        if source.startswith("(?i)"):
+            source = source[4:]
+            flag |= hyperscan.HS_FLAG_CASELESS
+        if "(?" in source or "\\S" in source:
+            return None
+        expressions.append(source.replace(r"\s", _ASCII_SPACE).encode("ascii"))
+        flags.append(flag)
+
+    database = hyperscan.Database()
+    try:
+        database.compile(expressions=expressions, ids=list(range(len(expressions))), flags=flags)
+        template = hyperscan.Scratch(database)
+    except hyperscan.error:
+        return None
+    scan = database.scan
+    terminated = hyperscan.ScanTerminated
+    # Scratch space can't be shared by concurrent scans: one per thread
+    local = threading.local()
+
+    def may_match(text: str) -> bool:
+        if not text.isascii():
+            return True
+        scratch = getattr(local, "scratch", None)
+        if scratch is None:
+            scratch = local.scratch = template.clone()
+        try:
+            scan(text.encode("ascii"), match_event_handler=_stop, scratch=scratch)
+        except terminated:
+            return True
+        return False
+
+    return may_match
@@ -0,0 +1,22 @@
+"""
+JSON encoding for request and response bodies sent by the SDK.
+
+orjson is optional (pip install agentsudo[fast]): it is several times
+faster than the stdlib encoder and works on bytes directly, so bodies
+skip the str <-> bytes copy.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to UTF-8 encoded JSON bytes."""
+        return json.dumps(obj).encode('utf-8')
+    
+    # The stdlib decoder accepts UTF-8 bytes as well as str
+    loads = json.loads
@@ -0,0 +1,143 @@
+"""
+Compiled scope matching shared between agents.
+
+A ScopeMatcher holds every lookup structure derived from one set of granted
+scopes, plus the cache of decisions already made against it. Decisions only
+depend on the scope set, so agents with identical scopes share one matcher
+(see ScopeMatcher.for_scopes) instead of each building their own.
+"""
+
+import fnmatch
+import re
+import sys
+import weakref
+from typing import FrozenSet, Iterable
+
+from ._scope_trie import ScopeTrie, is_trie_pattern
+
+_WILDCARD_CHARS = frozenset("*?[")
+
+# Upper bound on cached decisions per matcher. Scope strings built at
+# runtime (e.g. f"read:{tenant}") would otherwise grow the caches forever.
+DECISION_CACHE_LIMIT = 4096
+
+
+def _is_literal(text: str) -> bool:
+    return _WILDCARD_CHARS.isdisjoint(text)
+
+
+class ScopeMatcher:
+    """
+    Precompiled matcher for a fixed set of granted scopes.
+
+    Example:
+        matcher = ScopeMatcher.for_scopes(["read:*", "write:orders"])
+        matcher.match("read:weather")   # True
+        matcher.match("write:users")    # False
+    """
+
+    __slots__ = (
+        "scope_set",
+        "trie",
+        "patterns",
+        "universal_verbs",
+        "prefixes",
+        "suffixes",
+        "substrings",
+        "star_all",
+        "has_wildcards",
+        "granted",
+        "denied",
+        "__weakref__",
+    )
+
+    _cache: "weakref.WeakValueDictionary[FrozenSet[str], ScopeMatcher]" = weakref.WeakValueDictionary()
+
+    def __init__(self, scopes: Iterable[str]):
+        # Interned, so probes with an interned scope (as @sudo and the
+        # FastAPI dependencies use) hit the identity fast path of the
+        # set lookup instead of comparing string contents
+        self.scope_set = frozenset(map(sys.intern, scopes))
+        # Segment-aligned wildcards ('read:*') go in the trie. Other simple
+        # shapes are answered with str methods: 'read:orders*' -> startswith,
+        # '*:audit' -> endswith, '*tmp*' -> substring. Anything fancier
+        # ('admin:*:delete', 'del?te:x') is compiled to a regex once here.
+        self.trie = ScopeTrie()
+        prefixes, suffixes, substrings, patterns = [], [], [], []
+        for scope in self.scope_set:
+            # Literal scopes are answered by the exact frozenset lookup alone
+            if scope == "*" or _is_literal(scope):
+                continue
+            if is_trie_pattern(scope):
+                self.trie.insert(scope)
+            elif scope.endswith("*") and _is_literal(scope[:-1]):
+                prefixes.append(scope[:-1])
+            elif scope.startswith("*") and _is_literal(scope[1:]):
+                suffixes.append(scope[1:])
+            elif scope.startswith("*") and scope.endswith("*") and _is_literal(scope[1:-1]):
+                substrings.append(scope[1:-1])
+            else:
+                patterns.append(scope)
+        self.prefixes = tuple(prefixes)
+        self.suffixes = tuple(suffixes)
+        self.substrings = tuple(substrings)
+        # All complex patterns become one alternation: a single regex match
+        # per check instead of one per pattern
+        self.patterns = (
+            re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+            if patterns else None
+        )
+        self.star_all = "*" in self.scope_set
+        # Top-level wildcards ('read:*') answer any 'read:...' check in one lookup
+        self.universal_verbs = frozenset(
+            scope[:-2] for scope in self.scope_set
+            if scope.endswith(":*") and scope.count(":") == 1 and is_trie_pattern(scope)
+        )
+        self.has_wildcards = bool(
+            self.trie or self.prefixes or self.suffixes or self.substrings or self.patterns
+        )
+        # Decisions made so far (valid for the lifetime of this matcher).
+        # Seeded with the exact scopes, so literal grants hit the callers'
+        # 'scope in agent._granted' probe even on first use.
+        self.granted = set(self.scope_set)
+        self.denied = set()
+
+    @classmethod
+    def for_scopes(cls, scopes: Iterable[str]) -> "ScopeMatcher":
+        """Return the shared matcher for this scope set, building it if needed."""
+        key = frozenset(scopes)
+        matcher = cls._cache.get(key)
+        if matcher is None:
+            matcher = cls(key)
+            cls._cache[key] = matcher
+        return matcher
+
+    def match(self, required_scope: str) -> bool:
+        """Check a scope against the granted set without consulting the decision cache."""
+        # Exact match, or a bare '*' grant
+        if required_scope in self.scope_set or self.star_all:
+            return True
+
+        # Literal-only scope sets: the frozenset miss is a definitive denial
+        if not self.has_wildcards:
+            return False
+
+        # Universal verb ('read:*'): one partition + set lookup, no trie walk
+        verb, sep, _ = required_scope.partition(":")
+        if sep and verb in self.universal_verbs:
+            return True
+
+        # Wildcard match: trie walk and str methods first, precompiled
+        # regexes only for complex patterns
+        if self.trie.match(required_scope):
+            return True
+
+        if self.prefixes and required_scope.startswith(self.prefixes):
+            return True
+        if self.suffixes and required_scope.endswith(self.suffixes):
+            return True
+        for substring in self.substrings:
+            if substring in required_scope:
+                return True
+
+        return self.patterns is not None and self.patterns(required_scope) is not None
@@ -0,0 +1,69 @@
+"""
+Segment trie for wildcard scope matching.
+
+Scopes are split on ':' and stored as nested dicts, so checking
+'read:weather' against ['read:*', 'write:orders:*', ...] walks at most one
+node per segment instead of running fnmatch against every granted pattern.
+
+Only segment-aligned patterns are stored: every segment is a literal except
+an optional trailing '*' segment (e.g. 'read:*', 'admin:users:*', '*').
+Anything else ('read:orders*', '*:read', 'read:?') must be matched by the
+caller with fnmatch.
+"""
+
+from typing import Iterable
+
+_WILDCARD_CHARS = frozenset("*?[")
+_ANY = "*"
+_END = None  # Marks a node where a literal scope ends
+
+
+def is_trie_pattern(scope: str) -> bool:
+    """Return True if the scope can be represented in a ScopeTrie."""
+    *head, last = scope.split(":")
+    for segment in head:
+        if not _WILDCARD_CHARS.isdisjoint(segment):
+            return False
+    return last == _ANY or _WILDCARD_CHARS.isdisjoint(last)
+
+
+class ScopeTrie:
+    """
+    Trie of scope patterns keyed on ':' segments.
+
+    Example:
+        trie = ScopeTrie(["read:*", "write:orders"])
+        trie.match("read:weather")   # True
+        trie.match("write:orders")   # True
+        trie.match("write:users")    # False
+    """
+
+    def __init__(self, scopes: Iterable[str] = ()):
+        self._root: dict = {}
+        for scope in scopes:
+            self.insert(scope)
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+    def insert(self, scope: str):
+        """Add a segment-aligned scope pattern (see is_trie_pattern)."""
+        node = self._root
+        for segment in scope.split(":"):
+            if segment == _ANY:
+                # A trailing '*' grants everything below this node
+                node[_ANY] = True
+                return
+            node = node.setdefault(segment, {})
+        node[_END] = True
+
+    def match(self, required_scope: str) -> bool:
+        """Check whether any stored pattern grants the required scope."""
+        node = self._root
+        for segment in required_scope.split(":"):
+            if _ANY in node:
+                return True
+            node = node.get(segment)
+            if node is None:
+                return False
+        return _END in node
@@ -0,0 +1,26 @@
+"""
+Cheap UTC ISO-8601 timestamps for audit logs and telemetry.
+
+datetime.utcnow().isoformat() builds a datetime object and formats every
+field on each call. Events arrive many times per second, so the
+'YYYY-MM-DDTHH:MM:SS' part is formatted once per second and reused; only
+the microseconds are formatted per call.
+"""
+
+import time
+
+# (whole second, formatted prefix); replaced as a single tuple so readers
+# on other threads never see a mismatched pair
+_cached_second = (-1, "")
+
+
+def utc_isoformat() -> str:
+    """Return the current UTC time as 'YYYY-MM-DDTHH:MM:SS.ffffff'."""
+    global _cached_second
+    now = time.time()
+    second = int(now)
+    cached, prefix = _cached_second
+    if second != cached:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _cached_second = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1_000_000):06d}"
@@ -32,25 +32,39 @@ Usage:
             return {"status": "email sent"}
 """
 
+import inspect
 import logging
-from typing import Any, Callable, Dict, List, Optional, Union
-from functools import wraps
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from functools import lru_cache, wraps
 
 from ..core import Agent, get_current_agent as core_get_current_agent, logger, _log_action
 from ..guard import PermissionDeniedError
 
 # Lazy import FastAPI/Starlette
 try:
-    from fastapi import Depends, HTTPException, Request, Response
+    from fastapi import Depends, HTTPException, Request
     from fastapi.security import APIKeyHeader
-    from starlette.middleware.base import BaseHTTPMiddleware
-    from starlette.types import ASGIApp
+    from starlette.types import ASGIApp, Receive, Scope, Send
     FASTAPI_AVAILABLE = True
 except ImportError:
     FASTAPI_AVAILABLE = False
-    BaseHTTPMiddleware = object
     Request = None
-    Response = None
+
+
+# Granted checks log at DEBUG, which is normally disabled: test the level
+# before paying for _log_action's dict, timestamp and JSON encoding.
+_DEBUG = logging.DEBUG
+
+
+async def _send_unauthorized(send: "Send", body: bytes) -> None:
+    """Send a bare 401 response as raw ASGI messages."""
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [(b"content-length", str(len(body)).encode("latin-1"))],
+    })
+    await send({"type": "http.response.body", "body": body})
 
 
 def _check_fastapi():
@@ -78,7 +92,8 @@ def register_agent(agent: Agent, agent_id: Optional[str] = None) -> str:
     Returns:
         The agent ID used for registration
     """
-    aid = agent_id or agent.id
+    # Interned keys let lookups with an identical string hit dict's identity fast path
+    aid = sys.intern(agent_id or agent.id)
     _agent_registry[aid] = agent
     return aid
 
@@ -88,13 +103,31 @@ def get_agent(agent_id: str) -> Optional[Agent]:
     return _agent_registry.get(agent_id)
 
 
-class AgentSudoMiddleware(BaseHTTPMiddleware):
+def unregister_agent(agent_id: str) -> Optional[Agent]:
+    """
+    Remove an agent from the registry.
+    
+    Long-running services that register agents dynamically should call
+    this when an agent is retired; the registry holds strong references.
+    
+    Returns:
+        The removed Agent, or None if the ID was not registered
+    """
+    return _agent_registry.pop(agent_id, None)
+
+
+class AgentSudoMiddleware:
     """
     FastAPI middleware that extracts agent context from request headers.
     
     The middleware looks for an agent ID in the specified header and
     establishes an agent session for the duration of the request.
     
+    This is plain ASGI middleware: requests are passed straight to the
+    wrapped app, with no per-request task, memory stream or Request object
+    as with Starlette's BaseHTTPMiddleware, and streaming responses are
+    not buffered.
+    
     Example:
         app = FastAPI()
         app.add_middleware(
@@ -119,40 +152,111 @@ class AgentSudoMiddleware(BaseHTTPMiddleware):
             on_missing_agent: Behavior when no agent header is present
         """
         _check_fastapi()
-        super().__init__(app)
-        self.agent_header = agent_header
-        self.agent_lookup = agent_lookup or get_agent
+        self.app = app
+        self.agent_header = sys.intern(agent_header)
+        # Default to the registry's bound dict.get: no extra Python frame per request
+        self.agent_lookup = agent_lookup or _agent_registry.get
         self.on_missing_agent = on_missing_agent
+        # Raw ASGI header names are lowercase bytes
+        self._header_lower = agent_header.lower().encode("latin-1")
+        # Encoded once and reused for every rejected request
+        self._missing_body = f"Missing required header: {self.agent_header}".encode("utf-8")
+        # Resolve the missing-header policy once instead of per request
+        self._handle_missing = {
+            "error": self._missing_error,
+            "log": self._missing_log,
+        }.get(on_missing_agent, self.app)
+    
+    async def _missing_error(self, scope: "Scope", receive: "Receive", send: "Send") -> None:
+        await _send_unauthorized(send, self._missing_body)
     
-    async def dispatch(self, request: "Request", call_next) -> "Response":
-        agent_id = request.headers.get(self.agent_header)
+    async def _missing_log(self, scope: "Scope", receive: "Receive", send: "Send") -> None:
+        logger.warning(f"Request without agent header: {scope['path']}")
+        await self.app(scope, receive, send)
+    
+    async def __call__(self, scope: "Scope", receive: "Receive", send: "Send") -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        header = self._header_lower
+        agent_id = None
+        for key, value in scope["headers"]:
+            if key == header:
+                agent_id = value.decode("latin-1")
+                break
         
         if not agent_id:
-            if self.on_missing_agent == "error":
-                return Response(
-                    content=f"Missing required header: {self.agent_header}",
-                    status_code=401
-                )
-            elif self.on_missing_agent == "log":
-                logger.warning(f"Request without agent header: {request.url.path}")
-            # Allow request to proceed without agent context
-            return await call_next(request)
+            # "allow" (and unknown policies) resolve to the app itself
+            await self._handle_missing(scope, receive, send)
+            return
         
         agent = self.agent_lookup(agent_id)
         
         if not agent:
-            return Response(
-                content=f"Unknown agent: {agent_id}",
-                status_code=401
-            )
+            await _send_unauthorized(send, f"Unknown agent: {agent_id}".encode("utf-8"))
+            return
         
         # Execute request within agent session
         with agent.start_session():
             # Store agent in request state for dependency access
-            request.state.agent = agent
-            response = await call_next(request)
-        
-        return response
+            # (request.state is a view over scope["state"])
+            scope.setdefault("state", {})["agent"] = agent
+            await self.app(scope, receive, send)
+
+
+def _request_agent(request: "Request") -> Optional[Agent]:
+    """
+    Agent for this request: the one set by AgentSudoMiddleware, falling
+    back to the current session's ContextVar.
+    
+    Reads scope["state"] directly (request.state is a view over it), which
+    skips building a State object and its AttributeError-based miss path.
+    """
+    state = request.scope.get("state")
+    agent = state.get("agent") if state else None
+    return agent or core_get_current_agent()
+
+
+def _denial_handler(
+    scope: str,
+    on_deny: Union[str, Callable],
+    missing_detail: Callable[[Agent, str], str],
+) -> Callable[[Agent, "Request"], Awaitable[None]]:
+    """
+    Pick the denial behaviour for ``on_deny`` once, at factory time.
+    
+    The returned coroutine function returns None when the request may
+    proceed (audit mode, or the callback approved) and raises HTTPException
+    otherwise, so the per-request path never branches on ``on_deny``.
+    """
+    async def audit(agent: Agent, request: "Request") -> None:
+        _log_action("endpoint_audit_violation", agent, scope, request.url.path, False, level=logging.WARNING)
+    
+    async def defer_to_callback(agent: Agent, request: "Request") -> None:
+        path = request.url.path
+        context = {"endpoint": path, "method": request.method}
+        allowed = on_deny(agent, scope, context)
+        # Async callbacks (e.g. SlackApproval.arequest_approval) return a
+        # coroutine, which must be awaited rather than taken as approval
+        if inspect.isawaitable(allowed):
+            allowed = await allowed
+        if allowed:
+            _log_action("endpoint_callback_approved", agent, scope, path, True, level=logging.INFO)
+            return
+        _log_action("endpoint_callback_denied", agent, scope, path, False, level=logging.ERROR)
+        raise HTTPException(status_code=403, detail="Action rejected by approval policy")
+    
+    async def block(agent: Agent, request: "Request") -> None:
+        path = request.url.path
+        _log_action("endpoint_access_denied", agent, scope, path, False, level=logging.ERROR)
+        raise HTTPException(status_code=403, detail=missing_detail(agent, path))
+    
+    if on_deny == "log":
+        return audit
+    if callable(on_deny):
+        return defer_to_callback
+    return block
 
 
 def require_scope(
@@ -162,6 +266,11 @@ def require_scope(
     """
     FastAPI dependency that requires a specific scope.
     
+    Calls with the same scope and a string on_deny ("raise" or "log")
+    return the same dependency callable, so FastAPI resolves it only once
+    per request even when several routes or sub-dependencies declare it.
+    A callable on_deny gets a new dependency on every call.
+    
     Args:
         scope: Required permission scope
         on_deny: Behavior when permission denied
@@ -176,15 +285,25 @@ def require_scope(
         ):
             return {"agent": agent.name}
     """
+    # Callbacks are not cached: they may be unhashable, and the cache
+    # would keep them (and whatever they close over) alive
+    if isinstance(on_deny, str):
+        return _cached_scope_dependency(scope, on_deny)
+    return _scope_dependency(scope, on_deny)
+
+
+def _scope_dependency(scope: str, on_deny: Union[str, Callable]) -> Callable:
+    """Build the dependency returned by require_scope."""
     _check_fastapi()
+    scope = sys.intern(scope)
+    handle_denial = _denial_handler(
+        scope,
+        on_deny,
+        lambda agent, path: f"Agent '{agent.name}' missing scope '{scope}' for endpoint '{path}'",
+    )
     
     async def dependency(request: "Request") -> Agent:
-        # Try to get agent from request state (set by middleware)
-        agent = getattr(request.state, 'agent', None)
-        
-        # Fallback to context var
-        if not agent:
-            agent = core_get_current_agent()
+        agent = _request_agent(request)
         
         if not agent:
             raise HTTPException(
@@ -192,30 +311,20 @@ def require_scope(
                 detail="No agent context. Use AgentSudoMiddleware or establish session manually."
             )
         
-        if agent.has_scope(scope):
-            _log_action("endpoint_access_granted", agent.id, agent.name, scope, request.url.path, True, level=logging.DEBUG)
+        if scope in agent._granted or agent.has_scope(scope):
+            if logger.isEnabledFor(_DEBUG):
+                _log_action("endpoint_access_granted", agent, scope, request.url.path, True, level=_DEBUG)
             return agent
         
-        error_msg = f"Agent '{agent.name}' missing scope '{scope}' for endpoint '{request.url.path}'"
-        
-        if on_deny == "log":
-            _log_action("endpoint_audit_violation", agent.id, agent.name, scope, request.url.path, False, level=logging.WARNING)
-            return agent
-        elif callable(on_deny):
-            context = {"endpoint": request.url.path, "method": request.method}
-            if on_deny(agent, scope, context):
-                _log_action("endpoint_callback_approved", agent.id, agent.name, scope, request.url.path, True, level=logging.INFO)
-                return agent
-            else:
-                _log_action("endpoint_callback_denied", agent.id, agent.name, scope, request.url.path, False, level=logging.ERROR)
-                raise HTTPException(status_code=403, detail=f"Action rejected by approval policy")
-        else:
-            _log_action("endpoint_access_denied", agent.id, agent.name, scope, request.url.path, False, level=logging.ERROR)
-            raise HTTPException(status_code=403, detail=error_msg)
+        await handle_denial(agent, request)
+        return agent
     
     return dependency
 
 
+_cached_scope_dependency = lru_cache(maxsize=512)(_scope_dependency)
+
+
 def get_current_agent_dependency() -> Callable:
     """
     FastAPI dependency to get the current agent (without scope check).
@@ -228,10 +337,7 @@ def get_current_agent_dependency() -> Callable:
     _check_fastapi()
     
     async def dependency(request: "Request") -> Optional[Agent]:
-        agent = getattr(request.state, 'agent', None)
-        if not agent:
-            agent = core_get_current_agent()
-        return agent
+        return _request_agent(request)
     
     return dependency
 
@@ -251,13 +357,20 @@ class AgentContext:
             with ctx.require("write:logs"):
                 log_action(data)
             
+            # Or check several scopes in one go
+            with ctx.require_all(["read:data", "write:logs"]):
+                ...
+            
             return {"status": "done"}
     """
     
+    # Allocated per request: no per-instance __dict__
+    __slots__ = ("request", "_agent")
+    
     def __init__(self, request: "Request"):
         _check_fastapi()
         self.request = request
-        self._agent = getattr(request.state, 'agent', None) or core_get_current_agent()
+        self._agent = _request_agent(request)
     
     @property
     def agent(self) -> Optional[Agent]:
@@ -272,7 +385,20 @@ class AgentContext:
             scope: Required permission scope
             on_deny: Behavior when denied ("raise" or "log")
         """
-        return _ScopeContext(self._agent, scope, self.request.url.path, on_deny)
+        return _ScopeContext(self._agent, (scope,), self.request, on_deny)
+    
+    def require_all(self, scopes: List[str], on_deny: str = "raise"):
+        """
+        Context manager that checks several scopes at once.
+        
+        One context-manager entry and one log record cover all scopes,
+        instead of nesting a ``require()`` block per scope.
+        
+        Args:
+            scopes: Required permission scopes
+            on_deny: Behavior when any scope is missing ("raise" or "log")
+        """
+        return _ScopeContext(self._agent, tuple(scopes), self.request, on_deny)
     
     def has_scope(self, scope: str) -> bool:
         """Check if the current agent has a scope."""
@@ -284,28 +410,41 @@ class AgentContext:
 class _ScopeContext:
     """Internal context manager for scope checking."""
     
-    def __init__(self, agent: Optional[Agent], scope: str, endpoint: str, on_deny: str):
+    __slots__ = ("agent", "scopes", "request", "on_deny")
+    
+    def __init__(self, agent: Optional[Agent], scopes: tuple, request: "Request", on_deny: str):
         self.agent = agent
-        self.scope = scope
-        self.endpoint = endpoint
+        self.scopes = scopes
+        self.request = request
         self.on_deny = on_deny
     
+    @property
+    def endpoint(self) -> str:
+        # Resolved only when logging: building request.url parses the ASGI scope
+        return self.request.url.path
+    
     def __enter__(self):
         if not self.agent:
             raise HTTPException(status_code=401, detail="No agent context")
         
-        if self.agent.has_scope(self.scope):
-            _log_action("context_access_granted", self.agent.id, self.agent.name, self.scope, self.endpoint, True, level=logging.DEBUG)
+        results = self.agent.check_all(self.scopes)
+        
+        if all(results):
+            if logger.isEnabledFor(_DEBUG):
+                label = ",".join(self.scopes)
+                _log_action("context_access_granted", self.agent, label, self.endpoint, True, level=_DEBUG)
             return self.agent
         
+        label = ",".join(self.scopes)
         if self.on_deny == "log":
-            _log_action("context_audit_violation", self.agent.id, self.agent.name, self.scope, self.endpoint, False, level=logging.WARNING)
+            _log_action("context_audit_violation", self.agent, label, self.endpoint, False, level=logging.WARNING)
             return self.agent
         
-        _log_action("context_access_denied", self.agent.id, self.agent.name, self.scope, self.endpoint, False, level=logging.ERROR)
+        missing = ", ".join(s for s, ok in zip(self.scopes, results) if not ok)
+        _log_action("context_access_denied", self.agent, label, self.endpoint, False, level=logging.ERROR)
         raise HTTPException(
             status_code=403,
-            detail=f"Agent '{self.agent.name}' missing scope '{self.scope}'"
+            detail=f"Agent '{self.agent.name}' missing scope '{missing}'"
         )
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -317,6 +456,8 @@ def sudo_endpoint(scope: str, on_deny: Union[str, Callable] = "raise"):
     Decorator to protect a FastAPI endpoint with scope requirements.
     
     This is an alternative to using Depends(require_scope(...)).
+    Calls with the same scope and a string on_deny return the same
+    decorator; each decorated endpoint still gets its own wrapper.
     
     Example:
         @app.post("/refunds")
@@ -324,7 +465,21 @@ def sudo_endpoint(scope: str, on_deny: Union[str, Callable] = "raise"):
         async def process_refund(request: Request):
             return {"status": "done"}
     """
+    # Callbacks are not cached, as in require_scope
+    if isinstance(on_deny, str):
+        return _cached_endpoint_decorator(scope, on_deny)
+    return _endpoint_decorator(scope, on_deny)
+
+
+def _endpoint_decorator(scope: str, on_deny: Union[str, Callable]) -> Callable:
+    """Build the decorator returned by sudo_endpoint."""
     _check_fastapi()
+    scope = sys.intern(scope)
+    handle_denial = _denial_handler(
+        scope,
+        on_deny,
+        lambda agent, path: f"Agent '{agent.name}' missing scope '{scope}'",
+    )
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -344,31 +499,20 @@ def sudo_endpoint(scope: str, on_deny: Union[str, Callable] = "raise"):
                     detail="@sudo_endpoint requires Request parameter"
                 )
             
-            agent = getattr(request.state, 'agent', None) or core_get_current_agent()
+            agent = _request_agent(request)
             
             if not agent:
                 raise HTTPException(status_code=401, detail="No agent context")
             
-            if agent.has_scope(scope):
-                _log_action("endpoint_access_granted", agent.id, agent.name, scope, request.url.path, True, level=logging.DEBUG)
-                return await func(*args, **kwargs)
-            
-            error_msg = f"Agent '{agent.name}' missing scope '{scope}'"
-            
-            if on_deny == "log":
-                _log_action("endpoint_audit_violation", agent.id, agent.name, scope, request.url.path, False, level=logging.WARNING)
-                return await func(*args, **kwargs)
-            elif callable(on_deny):
-                context = {"endpoint": request.url.path, "method": request.method}
-                if on_deny(agent, scope, context):
-                    _log_action("endpoint_callback_approved", agent.id, agent.name, scope, request.url.path, True, level=logging.INFO)
-                    return await func(*args, **kwargs)
-                else:
-                    _log_action("endpoint_callback_denied", agent.id, agent.name, scope, request.url.path, False, level=logging.ERROR)
-                    raise HTTPException(status_code=403, detail="Action rejected by approval policy")
+            if scope in agent._granted or agent.has_scope(scope):
+                if logger.isEnabledFor(_DEBUG):
+                    _log_action("endpoint_access_granted", agent, scope, request.url.path, True, level=_DEBUG)
             else:
-                _log_action("endpoint_access_denied", agent.id, agent.name, scope, request.url.path, False, level=logging.ERROR)
-                raise HTTPException(status_code=403, detail=error_msg)
+                await handle_denial(agent, request)
+            return await func(*args, **kwargs)
         
         return wrapper
     return decorator
+
+
+_cached_endpoint_decorator = lru_cache(maxsize=512)(_endpoint_decorator)
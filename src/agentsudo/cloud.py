@@ -6,14 +6,17 @@ Usage:
     agentsudo.configure_cloud(api_key="as_your_api_key")
 """
 
+import atexit
 import os
 import threading
-import queue
 import time
-import json
+from collections import deque
+from urllib.parse import urlsplit
 import logging
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+
+from ._json import dumps as _dumps
+from ._timestamp import utc_isoformat
 
 logger = logging.getLogger("agentsudo.cloud")
 
@@ -31,21 +34,55 @@ class CloudConfig:
         async_send: bool = True,
         batch_size: int = 10,
         flush_interval: float = 5.0,
+        max_queue_size: Optional[int] = None,
     ):
         self.api_key = api_key
         self.endpoint = endpoint.rstrip('/')
         self.async_send = async_send
         self.batch_size = batch_size
         self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size or max(batch_size * 64, 1024)
         
-        # Event queue for async sending
-        self._event_queue: queue.Queue = queue.Queue()
+        # Pending events for async sending. deque.append/popleft are atomic,
+        # so producers never take a lock; _wakeup tells the worker a full
+        # batch is waiting (partial batches go out at the flush deadline).
+        # Bounded: if the endpoint is unreachable the oldest events are
+        # dropped instead of growing memory without limit.
+        self._event_deque: deque = deque(maxlen=self.max_queue_size)
+        self._dropped = 0
+        self._dropped_reported = 0
+        self._stats_lock = threading.Lock()
+        self._wakeup = threading.Event()
         self._worker_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
         
+        # Request target is built once (headers: see the api_key setter)
+        self._url = urlsplit(self.endpoint)
+        self._events_path = self._url.path + "/api/events"
+        
+        # One keep-alive connection reused across batches (TLS handshake once).
+        # Imported here: the HTTP stack is only loaded once cloud mode is on
+        from ._http import KeepAliveConnection
+        self._http = KeepAliveConnection(self.endpoint)
+        
         if async_send:
             self._start_worker()
     
+    @property
+    def api_key(self) -> str:
+        """Project API key. Assigning it rebuilds the request headers."""
+        return self._api_key
+    
+    @api_key.setter
+    def api_key(self, api_key: str):
+        self._api_key = api_key
+        # Built once per key instead of once per batch
+        self._headers = {
+            'Content-Type': 'application/json',
+            'X-API-Key': api_key,
+            'User-Agent': 'agentsudo-sdk/0.3.1',
+        }
+    
     def _start_worker(self):
         """Start background worker thread for sending events."""
         self._stop_event.clear()
@@ -55,102 +92,149 @@ class CloudConfig:
     def _worker_loop(self):
         """Background worker that batches and sends events."""
         batch: List[Dict[str, Any]] = []
-        last_flush = time.time()
+        deadline = time.monotonic() + self.flush_interval
         
         while not self._stop_event.is_set():
-            try:
-                # Try to get an event with timeout
-                event = self._event_queue.get(timeout=1.0)
-                batch.append(event)
-                
-                # Flush if batch is full or interval elapsed
-                if len(batch) >= self.batch_size or (time.time() - last_flush) >= self.flush_interval:
-                    self._send_batch(batch)
-                    batch = []
-                    last_flush = time.time()
-                    
-            except queue.Empty:
-                # Flush remaining events on timeout
-                if batch and (time.time() - last_flush) >= self.flush_interval:
+            if not self._event_deque:
+                self._wakeup.wait(timeout=max(0.0, deadline - time.monotonic()))
+            # Clear before draining so an append racing the drain re-sets it
+            self._wakeup.clear()
+            self._drain_into(batch, self.batch_size)
+            
+            # Flush if batch is full or the interval deadline passed
+            now = time.monotonic()
+            if len(batch) >= self.batch_size or now >= deadline:
+                if batch:
                     self._send_batch(batch)
                     batch = []
-                    last_flush = time.time()
+                deadline = now + self.flush_interval
         
         # Final flush on shutdown
         if batch:
             self._send_batch(batch)
     
-    def _send_batch(self, events: List[Dict[str, Any]]):
-        """Send a batch of events to the cloud endpoint."""
+    def _drain_into(self, batch: List[Dict[str, Any]], limit: int):
+        """Move queued events into batch without blocking, up to limit."""
+        events = self._event_deque
+        while len(batch) < limit:
+            try:
+                batch.append(events.popleft())
+            except IndexError:
+                break
+    
+    def _log_drops(self):
+        """Log a warning for events dropped since the last warning."""
+        with self._stats_lock:
+            count = self._dropped - self._dropped_reported
+            self._dropped_reported = self._dropped
+        if count:
+            logger.warning(
+                f"Cloud telemetry queue full: dropped {count} oldest events "
+                f"({self._dropped} in total, see CloudConfig.stats())"
+            )
+    
+    def _send_batch(self, events: List[Dict[str, Any]], timeout: Optional[float] = None) -> bool:
+        """Send a batch of events to the cloud endpoint. Returns True on success."""
         if not events:
-            return
+            return True
+        
+        # Drops are only reported locally: an extra event in the batch
+        # could get the whole batch rejected by the server
+        if self._dropped != self._dropped_reported:
+            self._log_drops()
             
         try:
-            import urllib.request
-            import urllib.error
-            import ssl
-            
-            # Try to use certifi for SSL certificates if available
-            try:
-                import certifi
-                ssl_context = ssl.create_default_context(cafile=certifi.where())
-            except ImportError:
-                # Fallback: create context that doesn't verify (for dev environments)
-                ssl_context = ssl.create_default_context()
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-            
-            url = f"{self.endpoint}/api/events"
-            data = json.dumps(events).encode('utf-8')
-            
-            req = urllib.request.Request(
-                url,
-                data=data,
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-API-Key': self.api_key,
-                    'User-Agent': 'agentsudo-sdk/0.3.1',
-                },
-                method='POST'
+            status, _ = self._http.request(
+                "POST", self._events_path, _dumps(events), self._headers, timeout
             )
             
-            with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
-                if response.status != 200:
-                    logger.warning(f"Cloud telemetry failed: {response.status}")
-                else:
-                    logger.debug(f"Cloud telemetry sent: {len(events)} events")
+            if status != 200:
+                logger.warning(f"Cloud telemetry failed: {status}")
+                return False
+            logger.debug(f"Cloud telemetry sent: {len(events)} events")
+            return True
                     
-        except urllib.error.URLError as e:
-            logger.debug(f"Cloud telemetry error: {e}")
         except Exception as e:
             logger.debug(f"Cloud telemetry error: {e}")
+            return False
     
     def send_event(self, event: Dict[str, Any]):
         """Queue an event for sending."""
         if self.async_send:
-            self._event_queue.put(event)
+            events = self._event_deque
+            if len(events) == self.max_queue_size:
+                # The append below evicts the oldest queued event
+                with self._stats_lock:
+                    self._dropped += 1
+            events.append(event)
+            # Wake the worker once per batch, not once per event
+            if len(events) >= self.batch_size:
+                self._wakeup.set()
         else:
             self._send_batch([event])
     
-    def flush(self):
-        """Flush all pending events immediately."""
-        if self.async_send:
-            # Drain the queue and send
-            events = []
-            while not self._event_queue.empty():
-                try:
-                    events.append(self._event_queue.get_nowait())
-                except queue.Empty:
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Flush pending events immediately, in batch_size chunks.
+        
+        Stops at the first failed send (the endpoint is down or rejecting
+        events), leaving the rest queued, and once timeout seconds have
+        passed if a timeout is given.
+        """
+        if not self.async_send:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            request_timeout = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     break
-            if events:
-                self._send_batch(events)
+                # A single slow request can't outlast the budget either
+                request_timeout = min(remaining, self._http.timeout)
+            events: List[Dict[str, Any]] = []
+            self._drain_into(events, self.batch_size)
+            if not events:
+                break
+            if not self._send_batch(events, request_timeout):
+                break
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Queue statistics for monitoring.
+        
+        Returns:
+            Dict with 'queued' (events waiting to be sent), 'dropped'
+            (events discarded because the queue was full) and
+            'max_queue_size'
+        """
+        return {
+            "queued": len(self._event_deque),
+            "dropped": self._dropped,
+            "max_queue_size": self.max_queue_size,
+        }
     
-    def shutdown(self):
-        """Shutdown the cloud connection gracefully."""
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Shutdown the cloud connection gracefully.
+        
+        Stopping the worker and flushing the queue share one budget of
+        timeout seconds, so an unreachable endpoint can't hold up
+        interpreter exit; events left over are dropped.
+        """
+        deadline = time.monotonic() + timeout
         self._stop_event.set()
+        self._wakeup.set()
         if self._worker_thread:
-            self._worker_thread.join(timeout=5.0)
-        self.flush()
+            self._worker_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            if self._worker_thread.is_alive():
+                # Still blocked on a send: the endpoint is too slow to flush to
+                logger.warning(
+                    f"Cloud telemetry shutdown timed out; {len(self._event_deque)} queued events dropped"
+                )
+                return
+        self.flush(timeout=max(0.0, deadline - time.monotonic()))
+        self._http.close()
 
 
 def configure_cloud(
@@ -159,6 +243,7 @@ def configure_cloud(
     async_send: bool = True,
     batch_size: int = 10,
     flush_interval: float = 5.0,
+    max_queue_size: Optional[int] = None,
 ) -> CloudConfig:
     """
     Configure cloud telemetry for AgentSudo.
@@ -170,6 +255,8 @@ def configure_cloud(
         async_send: Send events in background thread (default: True)
         batch_size: Number of events to batch before sending (default: 10)
         flush_interval: Seconds between automatic flushes (default: 5.0)
+        max_queue_size: Events held while waiting to be sent; the oldest are
+                        dropped beyond this (default: max(batch_size * 64, 1024))
     
     Returns:
         CloudConfig instance
@@ -199,6 +286,7 @@ def configure_cloud(
         async_send=async_send,
         batch_size=batch_size,
         flush_interval=flush_interval,
+        max_queue_size=max_queue_size,
     )
     
     logger.info(f"Cloud mode enabled: {endpoint}")
@@ -232,26 +320,38 @@ def send_telemetry(
         function_name: Name of the function being called
         metadata: Additional metadata to include
     """
-    config = get_cloud_config()
-    if not config:
+    # Single global load: the common disabled case returns before any work
+    config = _cloud_config
+    if config is None:
         return  # Cloud mode not enabled
     
+    # Only non-None fields are sent
     event = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": utc_isoformat() + "Z",
         "agent_name": agent_name,
         "action": action,
-        "scope": scope,
         "allowed": allowed,
-        "function_name": function_name,
-        "metadata": metadata,
     }
-    
-    # Remove None values
-    event = {k: v for k, v in event.items() if v is not None}
+    if scope is not None:
+        event["scope"] = scope
+    if function_name is not None:
+        event["function_name"] = function_name
+    if metadata is not None:
+        event["metadata"] = metadata
     
     config.send_event(event)
 
 
+def _shutdown_at_exit():
+    """Send events still queued when the interpreter exits."""
+    if _cloud_config is not None:
+        _cloud_config.shutdown()
+
+
+# The worker is a daemon thread and would otherwise be killed mid-queue
+atexit.register(_shutdown_at_exit)
+
+
 def disable_cloud():
     """Disable cloud telemetry."""
     global _cloud_config
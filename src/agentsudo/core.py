@@ -1,36 +1,138 @@
 import contextvars
+import functools
 import logging
-import uuid
+import os
 import time
-import fnmatch
 import json
-from typing import List, Optional, Set, Callable, Any
-from datetime import datetime
+from typing import Iterable, List, Optional, Set, Callable, Any
+from ._scope_matcher import DECISION_CACHE_LIMIT, ScopeMatcher
+from ._timestamp import utc_isoformat
 
 # Setup local logging
 logging.basicConfig(level=logging.WARNING, format='[%(levelname)s] %(message)s')
 logger = logging.getLogger("agentsudo")
 
 # 1. The Context Variable
-# Stores the current agent context for the executing thread.
-_current_agent_ctx = contextvars.ContextVar("current_agent", default=None)
+# Stores the current agent context for the executing thread or asyncio task.
+# Each task gets its own copy, so concurrent requests never see each other's agent.
+_current_agent_ctx: "contextvars.ContextVar[Optional[Agent]]" = contextvars.ContextVar("current_agent", default=None)
 
-def _log_action(action: str, agent_id: str, agent_name: str, scope: str, func_name: str, allowed: bool, level: int = logging.INFO):
+# action, scope and function names come from a small, fixed vocabulary
+# (decorator arguments and function names), so their JSON encodings are
+# memoized; the bound keeps runtime-built scope strings from growing it
+_json_str = functools.lru_cache(maxsize=1024)(json.dumps)
+
+def _log_action(action: str, agent: "Agent", scope: str, func_name: str, allowed: bool, level: int = logging.INFO):
     """Log in structured JSON format for audit/compliance."""
-    log_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "action": action,
-        "agent_id": agent_id,
-        "agent_name": agent_name,
-        "scope": scope,
-        "function": func_name,
-        "allowed": allowed
-    }
-    
-    # Log as JSON for programmatic parsing
-    logger.log(level, json.dumps(log_entry))
+    # Filtered records (e.g. DEBUG grants under the default WARNING level)
+    # cost one cached level check, not a timestamp and JSON encoding
+    if not logger.isEnabledFor(level):
+        return
+    # Assembled from pre-encoded parts instead of json.dumps() on a fresh
+    # dict; the output is identical to json.dumps of the same fields
+    logger.log(level, (
+        '{"timestamp": "' + utc_isoformat()
+        + '", "action": ' + _json_str(action)
+        + ", " + agent._log_fragment()
+        + ', "scope": ' + _json_str(scope)
+        + ', "function": ' + _json_str(func_name)
+        + (', "allowed": true}' if allowed else ', "allowed": false}')
+    ))
+
+class _ScopeSet(set):
+    """
+    A set of scopes that tells its owning Agent when it is mutated, so the
+    Agent can rebuild its precomputed lookup structures.
+    """
+
+    def __init__(self, scopes=(), owner: Optional["Agent"] = None):
+        super().__init__(scopes)
+        self._owner = owner
+
+    def __reduce__(self):
+        # Copies and pickles are plain sets, detached from the agent
+        return (set, (list(self),))
+
+    def _changed(self):
+        if self._owner is not None:
+            self._owner._invalidate_scopes()
+
+    def add(self, scope):
+        super().add(scope)
+        self._changed()
+
+    def discard(self, scope):
+        super().discard(scope)
+        self._changed()
+
+    def remove(self, scope):
+        super().remove(scope)
+        self._changed()
+
+    def pop(self):
+        scope = super().pop()
+        self._changed()
+        return scope
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def update(self, *others):
+        super().update(*others)
+        self._changed()
+
+    def difference_update(self, *others):
+        super().difference_update(*others)
+        self._changed()
+
+    def intersection_update(self, *others):
+        super().intersection_update(*others)
+        self._changed()
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
 
 class Agent:
+    # Fixed attribute layout: faster attribute access on the permission-check
+    # hot path and no per-instance __dict__.
+    __slots__ = (
+        "id",
+        "name",
+        "role",
+        "session_ttl",
+        "session_expires_at",
+        "guardrails",
+        "_token",
+        "_scopes",
+        "_matcher",
+        "_granted",
+        "_denied",
+        "_log_fields",
+        "__weakref__",
+    )
+
+    # Rebuilt from the scopes rather than copied or pickled
+    _DERIVED = frozenset(("_matcher", "_granted", "_denied", "__weakref__"))
+
     def __init__(
         self, 
         name: str, 
@@ -39,14 +141,40 @@ class Agent:
         session_ttl: int = 3600,
         guardrails: Optional[Any] = None,
     ):
-        self.id = str(uuid.uuid4())
+        # 128 random bits like uuid4, without building and formatting a UUID
+        self.id = os.urandom(16).hex()
         self.name = name
-        self.scopes = set(scopes) # Use set for O(1) lookups
+        self.scopes = scopes
         self.role = role
         self.session_ttl = session_ttl # seconds
         self.session_expires_at: Optional[float] = None
         self._token = None
         self.guardrails = guardrails  # Optional Guardrails instance
+        self._log_fields = (None, None, "")
+
+    def __getstate__(self):
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name not in self._DERIVED and hasattr(self, name)
+        }
+
+    def __setstate__(self, state):
+        scopes = state.pop("_scopes")
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.scopes = scopes
+
+    def _log_fragment(self) -> str:
+        """
+        The '"agent_id": ..., "agent_name": ...' part of audit log records,
+        JSON-encoded once and reused until the id or name changes.
+        """
+        agent_id, name, fragment = self._log_fields
+        if agent_id is not self.id or name is not self.name:
+            fragment = f'"agent_id": {json.dumps(self.id)}, "agent_name": {json.dumps(self.name)}'
+            self._log_fields = (self.id, self.name, fragment)
+        return fragment
 
     def start_session(self):
         """
@@ -55,21 +183,56 @@ class Agent:
         """
         return AgentSession(self)
 
+    @property
+    def scopes(self) -> Set[str]:
+        """The agent's granted scopes. Mutating this set updates permission checks."""
+        return self._scopes
+
+    @scopes.setter
+    def scopes(self, scopes):
+        self._scopes = _ScopeSet(scopes, self)
+        self._invalidate_scopes()
+
+    def _invalidate_scopes(self):
+        """Switch to the matcher (and decision cache) for the current scopes."""
+        self._matcher = ScopeMatcher.for_scopes(self._scopes)
+        self._granted = self._matcher.granted
+        self._denied = self._matcher.denied
+
     def has_scope(self, required_scope: str) -> bool:
         """
         Check if the agent has the required scope.
         Supports wildcards: 'write:*' matches 'write:refunds', 'write:emails', etc.
         """
-        # Exact match
-        if required_scope in self.scopes:
+        # Read the matcher once: its caches are shared with every agent
+        # holding the same scopes, so a decision must only be cached in the
+        # matcher that made it, even if agent.scopes changes mid-check
+        matcher = self._matcher
+
+        # '*' grants everything: no lookup, and nothing worth caching
+        if matcher.star_all:
             return True
-        
-        # Wildcard match
-        for scope in self.scopes:
-            if fnmatch.fnmatch(required_scope, scope):
-                return True
-        
-        return False
+
+        # Previously decided (cached until scopes change)
+        if required_scope in matcher.granted:
+            return True
+        if required_scope in matcher.denied:
+            return False
+
+        allowed = matcher.match(required_scope)
+        cache = matcher.granted if allowed else matcher.denied
+        if len(cache) >= DECISION_CACHE_LIMIT:
+            cache.clear()
+        cache.add(required_scope)
+        return allowed
+
+    def check_all(self, scopes: Iterable[str]) -> List[bool]:
+        """
+        Check several scopes at once.
+        Returns one bool per scope, in the order given.
+        """
+        granted = self._granted
+        return [scope in granted or self.has_scope(scope) for scope in scopes]
 
 class AgentSession:
     def __init__(self, agent: Agent):
@@ -78,17 +241,19 @@ class AgentSession:
 
     def __enter__(self):
         # Set expiry
-        self.agent.session_expires_at = time.time() + self.agent.session_ttl
+        # Monotonic clock: wall-clock (NTP) adjustments can't end or extend sessions
+        self.agent.session_expires_at = time.monotonic() + self.agent.session_ttl
         
         # Set the global context to this agent
         self.token = _current_agent_ctx.set(self.agent)
         
-        # Structured Log (INFO)
-        logger.info(json.dumps({
-            "event": "session_start",
-            "agent_name": self.agent.name,
-            "expires_in_seconds": self.agent.session_ttl
-        }))
+        # Structured Log (INFO), only encoded when INFO records are emitted
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "session_start",
+                "agent_name": self.agent.name,
+                "expires_in_seconds": self.agent.session_ttl
+            }))
         
         return self.agent
 
@@ -98,10 +263,11 @@ class AgentSession:
         self.agent.session_expires_at = None
         
         # Structured Log (INFO)
-        logger.info(json.dumps({
-            "event": "session_end",
-            "agent_name": self.agent.name
-        }))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "session_end",
+                "agent_name": self.agent.name
+            }))
 
 def get_current_agent() -> Optional[Agent]:
     return _current_agent_ctx.get()
@@ -1,26 +1,33 @@
 import functools
+import inspect
+import sys
 import time
 import logging
 from typing import Union, Callable, Any
-from .core import get_current_agent, logger, _log_action
+from .core import _current_agent_ctx, logger, _log_action
 
 class PermissionDeniedError(PermissionError):
     """Raised when an agent attempts an action without scope."""
     pass
 
+# Resolved once at import instead of on every permission check
+try:
+    from . import cloud as _cloud
+except ImportError:
+    _cloud = None  # Cloud module not available
+
 def _send_cloud_telemetry(agent_name: str, action: str, scope: str, function_name: str, allowed: bool):
     """Send telemetry to cloud if configured (non-blocking)."""
+    if _cloud is None or _cloud._cloud_config is None:
+        return
     try:
-        from .cloud import send_telemetry
-        send_telemetry(
+        _cloud.send_telemetry(
             agent_name=agent_name,
             action=action,
             scope=scope,
             allowed=allowed,
             function_name=function_name,
         )
-    except ImportError:
-        pass  # Cloud module not available
     except Exception:
         pass  # Don't let telemetry errors affect the main flow
 
@@ -34,7 +41,12 @@ def sudo(scope: str, on_deny: Union[str, Callable] = "raise"):
                     - "log": Log a warning and ALLOW (Audit Mode)
                     - callable: Function(agent, scope, context) -> bool
                                 Returns True to allow, False to deny.
+                                Coroutine callbacks are awaited when the
+                                decorated function is itself async.
     """
+    # Interned to match the interned grants in the agent's scope sets
+    scope = sys.intern(scope)
+    
     def decorator(func):
         # Check if we're wrapping a LangChain tool - if so, wrap its underlying func
         is_langchain_tool = hasattr(func, 'func') and hasattr(func, 'args_schema')
@@ -45,68 +57,142 @@ def sudo(scope: str, on_deny: Union[str, Callable] = "raise"):
         else:
             original_func = func
         
-        @functools.wraps(original_func)
-        def wrapper(*args, **kwargs):
-            # 1. Identify the Agent
-            agent = get_current_agent()
+        # Resolved once at decoration time instead of on every call
+        func_name = original_func.__name__
+        get_agent = _current_agent_ctx.get
+        clock = time.monotonic
+        cloud = _cloud
+        
+        def check():
+            """
+            Run every check that doesn't involve the on_deny callback.
+            Returns None if the call may proceed, or the Agent if the
+            callback has to decide. Raises PermissionDeniedError otherwise.
+            """
+            # 1. Identify the Agent (direct ContextVar read, no helper frame)
+            agent = get_agent()
 
             if not agent:
-                logger.warning(f"BLOCK | Function '{original_func.__name__}' called outside an Agent Session.")
+                logger.warning(f"BLOCK | Function '{func_name}' called outside an Agent Session.")
                 raise PermissionDeniedError(
-                    f"Function '{original_func.__name__}' requires an active agent session. "
+                    f"Function '{func_name}' requires an active agent session. "
                     f"Use: with agent.start_session(): ..."
                 )
 
             # 2. Check Session Expiry
-            if agent.session_expires_at and time.time() > agent.session_expires_at:
+            expires_at = agent.session_expires_at
+            if expires_at and clock() > expires_at:
                 logger.warning(f"BLOCK | Agent '{agent.name}' session expired.")
                 raise PermissionDeniedError("Agent session expired. Start a new session.")
 
-            # 3. Check Permissions
-            if agent.has_scope(scope):
-                # Authorized - Log at DEBUG level (not to spam)
-                _log_action("access_granted", agent.id, agent.name, scope, original_func.__name__, True, level=logging.DEBUG)
-                # Send to cloud dashboard
-                _send_cloud_telemetry(agent.name, "permission_check", scope, original_func.__name__, True)
-                return original_func(*args, **kwargs)
+            # 3. Check Permissions (cached grants skip the matcher entirely)
+            if scope in agent._granted or agent.has_scope(scope):
+                # Authorized - Log at DEBUG level (not to spam); the level
+                # check here also skips the call itself on the hot path
+                if logger.isEnabledFor(logging.DEBUG):
+                    _log_action("access_granted", agent, scope, func_name, True, level=logging.DEBUG)
+                # Send to cloud dashboard (checked inline: with cloud mode
+                # off, a grant makes no further calls)
+                if cloud is not None and cloud._cloud_config is not None:
+                    _send_cloud_telemetry(agent.name, "permission_check", scope, func_name, True)
+                return None
             
-            # 4. Handle Denial / Audit / Callback
-            error_msg = (
+            # 4. Handle Denial / Audit / Callback (handler picked at decoration time)
+            return handle_denial(agent)
+
+        def audit(agent):
+            # Audit Mode: Log violation but PROCEED
+            _log_action("audit_violation", agent, scope, func_name, False, level=logging.WARNING)
+            _send_cloud_telemetry(agent.name, "audit_violation", scope, func_name, False)
+            return None
+
+        def defer_to_callback(agent):
+            # Custom Callback decides
+            return agent
+
+        def block(agent):
+            # Default: Block and Raise
+            _log_action("access_denied", agent, scope, func_name, False, level=logging.ERROR)
+            _send_cloud_telemetry(agent.name, "permission_denied", scope, func_name, False)
+            raise PermissionDeniedError(
                 f"Agent '{agent.name}' missing required scope: '{scope}'. "
                 f"Agent has: {list(agent.scopes)}."
             )
-            
-            if on_deny == "log":
-                # Audit Mode: Log violation but PROCEED
-                _log_action("audit_violation", agent.id, agent.name, scope, original_func.__name__, False, level=logging.WARNING)
-                _send_cloud_telemetry(agent.name, "audit_violation", scope, original_func.__name__, False)
-                return original_func(*args, **kwargs)
-            
-            elif callable(on_deny):
-                # Custom Callback
-                # Simplified context for the callback
-                context = {
-                    "function": original_func.__name__,
-                    "args": args,
-                    "kwargs": kwargs
-                }
-                
-                allowed = on_deny(agent, scope, context)
-                
-                if allowed:
-                    _log_action("callback_approved", agent.id, agent.name, scope, original_func.__name__, True, level=logging.INFO)
-                    _send_cloud_telemetry(agent.name, "callback_approved", scope, original_func.__name__, True)
-                    return original_func(*args, **kwargs)
-                else:
-                    _log_action("callback_denied", agent.id, agent.name, scope, original_func.__name__, False, level=logging.ERROR)
-                    _send_cloud_telemetry(agent.name, "callback_denied", scope, original_func.__name__, False)
-                    raise PermissionDeniedError(f"Action rejected by approval policy: {scope}")
 
+        if on_deny == "log":
+            handle_denial = audit
+        elif callable(on_deny):
+            handle_denial = defer_to_callback
+        else:
+            handle_denial = block
+
+        def callback_context(args, kwargs):
+            # Simplified context for the callback
+            return {
+                "function": func_name,
+                "args": args,
+                "kwargs": kwargs
+            }
+
+        def settle_callback(agent, allowed):
+            if allowed:
+                _log_action("callback_approved", agent, scope, func_name, True, level=logging.INFO)
+                _send_cloud_telemetry(agent.name, "callback_approved", scope, func_name, True)
+            else:
+                _log_action("callback_denied", agent, scope, func_name, False, level=logging.ERROR)
+                _send_cloud_telemetry(agent.name, "callback_denied", scope, func_name, False)
+                raise PermissionDeniedError(f"Action rejected by approval policy: {scope}")
+
+        is_async = inspect.iscoroutinefunction(original_func)
+        if not is_async and inspect.iscoroutinefunction(on_deny):
+            raise TypeError(
+                f"Async on_deny callback requires an async function, "
+                f"but '{func_name}' is synchronous."
+            )
+
+        # "raise" and "log" never hand the decision to a callback, so their
+        # wrappers are just the check and the call
+        if handle_denial is not defer_to_callback:
+            if is_async:
+                @functools.wraps(original_func)
+                async def wrapper(*args, **kwargs):
+                    check()
+                    return await original_func(*args, **kwargs)
             else:
-                # Default: Block and Raise
-                _log_action("access_denied", agent.id, agent.name, scope, original_func.__name__, False, level=logging.ERROR)
-                _send_cloud_telemetry(agent.name, "permission_denied", scope, original_func.__name__, False)
-                raise PermissionDeniedError(error_msg)
+                @functools.wraps(original_func)
+                def wrapper(*args, **kwargs):
+                    check()
+                    return original_func(*args, **kwargs)
+        elif is_async:
+            @functools.wraps(original_func)
+            async def wrapper(*args, **kwargs):
+                agent = check()
+                if agent is not None:
+                    allowed = on_deny(agent, scope, callback_context(args, kwargs))
+                    # Async callbacks (e.g. SlackApproval.arequest_approval)
+                    # wait on the event loop instead of blocking a thread
+                    if inspect.isawaitable(allowed):
+                        allowed = await allowed
+                    settle_callback(agent, allowed)
+                return await original_func(*args, **kwargs)
+        else:
+            @functools.wraps(original_func)
+            def wrapper(*args, **kwargs):
+                agent = check()
+                if agent is not None:
+                    allowed = on_deny(agent, scope, callback_context(args, kwargs))
+                    # Callable objects with an async __call__ get past the
+                    # decoration-time check; a coroutine is not an approval
+                    if inspect.isawaitable(allowed):
+                        close = getattr(allowed, "close", None)
+                        if close is not None:
+                            close()
+                        raise TypeError(
+                            f"on_deny returned an awaitable, but '{func_name}' is synchronous. "
+                            f"Use a synchronous callback."
+                        )
+                    settle_callback(agent, allowed)
+                return original_func(*args, **kwargs)
 
         # If wrapping a LangChain tool, replace its func with our wrapper and return the tool
         if is_langchain_tool:
@@ -6,17 +6,103 @@ agents from responding to off-topic queries or prompt injection attempts.
 """
 
 import functools
+import inspect
 import re
 import logging
 import json
-from typing import List, Optional, Callable, Any, Union
-from .core import get_current_agent, logger
+from typing import Iterable, List, Optional, Callable, Any, Sequence, Tuple, Union
+from .core import _current_agent_ctx, get_current_agent, logger
+from ._hyperscan import compile_screen
 
 class GuardrailViolation(Exception):
     """Raised when input/output violates guardrail policies."""
     pass
 
 
+# Shared between Guardrails built with the same lists (e.g. several
+# @guardrail decorators with one config), so each list compiles once
+@functools.lru_cache(maxsize=128)
+def _literal_search(words: Tuple[str, ...]) -> Optional[Callable[[str], Any]]:
+    """Bound case-insensitive search for any of the words, or None if empty."""
+    if not words:
+        return None
+    return re.compile("|".join(map(re.escape, words)), re.IGNORECASE).search
+
+
+# Common prompt injection patterns (built-in protection), compiled once at
+# import and shared by every Guardrails instance
+_INJECTION_PATTERNS = [re.compile(p) for p in [
+    r"(?i)ignore\s+(all\s+)?(previous|prior|above)\s+(instructions?|prompts?|rules?)",
+    r"(?i)disregard\s+(all\s+)?(previous|prior|above|your)",
+    r"(?i)forget\s+(everything|all|your)(\s+you)?(\s+were)?(\s+told)?",
+    r"(?i)pretend\s+(you\s+are|to\s+be|you're)",
+    r"(?i)act\s+as\s+(if|though)?\s*(you\s+are|a|an)",
+    r"(?i)you\s+are\s+now\s+(a|an|in)",
+    r"(?i)new\s+(instructions?|rules?|persona)",
+    r"(?i)system\s*:\s*",
+    r"(?i)\[system\]",
+    r"(?i)override\s+(your|the|all)\s+(instructions?|rules?|restrictions?)",
+]]
+
+# Shortest text any built-in injection pattern can match ("system:"); the
+# injection rules are skipped for shorter inputs such as "yes" or "ok"
+_INJECTION_MIN_LENGTH = 7
+
+_INJECTION_RULES = tuple(
+    (pattern.search, f"Potential prompt injection detected: {pattern.pattern}")
+    for pattern in _INJECTION_PATTERNS
+)
+
+# With Hyperscan installed, one DFA pass clears injection-free inputs
+# before any injection regex runs (None otherwise)
+_INJECTION_SCREEN = compile_screen(_INJECTION_PATTERNS)
+
+
+class _RuleTable:
+    """
+    The regex rules of one Guardrails configuration, in check order: the
+    built-in injection patterns, then the blocked patterns.
+    
+    Each rule is a (bound search, rejection reason) pair, so checking an
+    input is one loop over a flat tuple and a hit returns its prebuilt
+    reason. The patterns are searched one by one on purpose: each keeps
+    re's literal-prefix scan, which a single alternation of all of them
+    loses (measured 2-3x slower on clean text).
+    """
+    
+    __slots__ = ("compiled", "rules", "blocked_rules")
+    
+    def __init__(self, patterns: Sequence[Union[str, "re.Pattern[str]"]]):
+        # Invalid patterns raise re.error here, at construction
+        self.compiled = [re.compile(p) for p in patterns]
+        self.blocked_rules = tuple(
+            (pattern.search, f"Input matches blocked pattern: {pattern.pattern}")
+            for pattern in self.compiled
+        )
+        self.rules = _INJECTION_RULES + self.blocked_rules
+    
+    def first_violation(self, text: str) -> Optional[str]:
+        """Return the reason for the first rule the text breaks, or None."""
+        # Inputs too short for any injection pattern, or cleared by the
+        # Hyperscan screen, only need the blocked rules
+        if len(text) < _INJECTION_MIN_LENGTH or (
+            _INJECTION_SCREEN is not None and not _INJECTION_SCREEN(text)
+        ):
+            rules = self.blocked_rules
+        else:
+            rules = self.rules
+        for search, reason in rules:
+            if search(text) is not None:
+                return reason
+        return None
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_rules(patterns: Tuple[str, ...]) -> _RuleTable:
+    """Return the shared _RuleTable for these blocked pattern strings."""
+    return _RuleTable(patterns)
+
+
 class Guardrails:
     """
     Guardrails configuration for an Agent.
@@ -44,6 +130,7 @@ class Guardrails:
         custom_output_validator: Optional[Callable[[str], bool]] = None,
         on_violation: str = "raise",  # "raise", "log", "redirect"
         redirect_message: str = "I can only help with topics related to my expertise.",
+        max_input_length: Optional[int] = None,
     ):
         """
         Initialize guardrails.
@@ -57,28 +144,57 @@ class Guardrails:
             custom_output_validator: Function(output: str) -> bool. Return False to block.
             on_violation: Behavior on violation - "raise", "log", or "redirect".
             redirect_message: Message to return when redirecting off-topic queries.
+            max_input_length: Optional cap on input length, in characters (e.g. 1_048_576).
+                             Longer inputs are rejected before any pattern runs.
+                             Default None: no cap.
         """
-        self.allowed_topics = [t.lower() for t in (allowed_topics or [])]
-        self.blocked_patterns = [re.compile(p) for p in (blocked_patterns or [])]
-        self.blocked_keywords = [k.lower() for k in (blocked_keywords or [])]
+        # Compiled once here; assigning to these attributes later recompiles
+        self.allowed_topics = allowed_topics
+        self.blocked_patterns = blocked_patterns
+        self.blocked_keywords = blocked_keywords
         self.custom_input_validator = custom_input_validator
         self.custom_output_validator = custom_output_validator
         self.on_violation = on_violation
         self.redirect_message = redirect_message
+        self.max_input_length = max_input_length
         
-        # Common prompt injection patterns (built-in protection)
-        self._injection_patterns = [
-            re.compile(r"(?i)ignore\s+(all\s+)?(previous|prior|above)\s+(instructions?|prompts?|rules?)"),
-            re.compile(r"(?i)disregard\s+(all\s+)?(previous|prior|above|your)"),
-            re.compile(r"(?i)forget\s+(everything|all|your)(\s+you)?(\s+were)?(\s+told)?"),
-            re.compile(r"(?i)pretend\s+(you\s+are|to\s+be|you're)"),
-            re.compile(r"(?i)act\s+as\s+(if|though)?\s*(you\s+are|a|an)"),
-            re.compile(r"(?i)you\s+are\s+now\s+(a|an|in)"),
-            re.compile(r"(?i)new\s+(instructions?|rules?|persona)"),
-            re.compile(r"(?i)system\s*:\s*"),
-            re.compile(r"(?i)\[system\]"),
-            re.compile(r"(?i)override\s+(your|the|all)\s+(instructions?|rules?|restrictions?)"),
-        ]
+        # Built-in prompt injection protection, compiled once at import
+        self._injection_patterns = _INJECTION_PATTERNS
+    
+    # The rule lists are exposed as tuples: the compiled matchers are built
+    # from them, so they are replaced by assignment (which recompiles)
+    # rather than mutated in place (which would silently not apply)
+    
+    @property
+    def allowed_topics(self) -> Tuple[str, ...]:
+        """Allowed topic keywords (lowercased). Assign a new list to change them."""
+        return self._allowed_topics
+    
+    @allowed_topics.setter
+    def allowed_topics(self, topics: Optional[Iterable[str]]):
+        self._allowed_topics = tuple(t.lower() for t in (topics or ()))
+        # One pass over the input per check instead of one 'in' scan per topic
+        self._topic_search = _literal_search(self._allowed_topics)
+    
+    @property
+    def blocked_keywords(self) -> Tuple[str, ...]:
+        """Blocked keywords (lowercased). Assign a new list to change them."""
+        return self._blocked_keywords
+    
+    @blocked_keywords.setter
+    def blocked_keywords(self, keywords: Optional[Iterable[str]]):
+        self._blocked_keywords = tuple(k.lower() for k in (keywords or ()))
+        self._keyword_search = _literal_search(self._blocked_keywords)
+    
+    @property
+    def blocked_patterns(self) -> Tuple["re.Pattern[str]", ...]:
+        """Compiled blocked patterns. Assign a new list of regexes to change them."""
+        return self._blocked_patterns
+    
+    @blocked_patterns.setter
+    def blocked_patterns(self, patterns: Optional[Iterable[Union[str, "re.Pattern[str]"]]]):
+        self._rules = _compile_rules(tuple(patterns or ()))
+        self._blocked_patterns = tuple(self._rules.compiled)
     
     def validate_input(self, user_input: str) -> tuple[bool, Optional[str]]:
         """
@@ -87,31 +203,30 @@ class Guardrails:
         Returns:
             Tuple of (is_valid, violation_reason)
         """
-        input_lower = user_input.lower()
-        
-        # 1. Check for prompt injection patterns (always enabled)
-        for pattern in self._injection_patterns:
-            if pattern.search(user_input):
-                return False, f"Potential prompt injection detected: {pattern.pattern}"
+        # 0. Size cap: oversized inputs never reach the regexes
+        if self.max_input_length is not None and len(user_input) > self.max_input_length:
+            return False, f"Input exceeds maximum length of {self.max_input_length} characters"
         
-        # 2. Check blocked patterns
-        for pattern in self.blocked_patterns:
-            if pattern.search(user_input):
-                return False, f"Input matches blocked pattern: {pattern.pattern}"
+        # 1-2. Prompt injection patterns (always enabled), then blocked
+        # patterns: one pass over the rule table
+        reason = self._rules.first_violation(user_input)
+        if reason is not None:
+            return False, reason
         
         # 3. Check blocked keywords
-        for keyword in self.blocked_keywords:
-            if keyword in input_lower:
-                return False, f"Input contains blocked keyword: {keyword}"
+        if self._keyword_search is not None:
+            match = self._keyword_search(user_input)
+            if match is not None:
+                return False, f"Input contains blocked keyword: {self._first_keyword(user_input, match)}"
         
         # 4. Check allowed topics (if configured)
-        if self.allowed_topics:
-            topic_found = any(topic in input_lower for topic in self.allowed_topics)
-            # Allow short responses (likely follow-ups like "yes", "no", "ok")
+        if self._topic_search is not None:
+            # Allow short responses (likely follow-ups like "yes", "no", "ok");
+            # they are let through before the topic scan rather than after it
             is_short_response = len(user_input.strip()) < 20
             
-            if not topic_found and not is_short_response:
-                return False, f"Input not related to allowed topics: {self.allowed_topics}"
+            if not is_short_response and self._topic_search(user_input) is None:
+                return False, f"Input not related to allowed topics: {list(self._allowed_topics)}"
         
         # 5. Custom validator
         if self.custom_input_validator:
@@ -120,6 +235,32 @@ class Guardrails:
         
         return True, None
     
+    def _first_keyword(self, user_input: str, match: "re.Match[str]") -> str:
+        """
+        The keyword to name in the rejection: the first one in
+        blocked_keywords order that the input contains, not the one that
+        happens to come first in the text.
+        """
+        lowered = user_input.lower()
+        for keyword in self._blocked_keywords:
+            if keyword in lowered:
+                return keyword
+        # Case-insensitive matches that lower() doesn't reproduce
+        return match.group().lower()
+    
+    def validate_inputs(self, user_inputs: Iterable[str]) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Validate several inputs (e.g. retrieved RAG chunks) in one call.
+        
+        Every input goes through the same checks as validate_input, using
+        the patterns compiled once for this configuration.
+        
+        Returns:
+            One (is_valid, violation_reason) tuple per input, in order
+        """
+        validate = self.validate_input
+        return [validate(user_input) for user_input in user_inputs]
+    
     def validate_output(self, output: str) -> tuple[bool, Optional[str]]:
         """
         Validate agent output against guardrails.
@@ -164,6 +305,50 @@ class Guardrails:
             raise GuardrailViolation(reason)
 
 
+# Keyword arguments searched for the user input, in order
+_INPUT_NAMES = ("input", "query", "message", "user_input", "text")
+
+
+def _input_getter(func: Callable) -> Callable[[tuple, dict], Optional[str]]:
+    """
+    Build a function that picks the user input out of a call's arguments:
+    the first positional argument if it is a string, otherwise the first
+    string passed under one of _INPUT_NAMES (by keyword or by position).
+    Which names and positions can apply is worked out once from the
+    signature instead of on every call.
+    """
+    try:
+        params = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        params = None
+    
+    if params is None or any(p.kind is p.VAR_KEYWORD for p in params.values()):
+        # Unknown or open-ended signature: any of the names may be passed
+        names = _INPUT_NAMES
+        positions = ()
+    else:
+        names = tuple(name for name in _INPUT_NAMES if name in params)
+        positional = [
+            p.name for p in params.values()
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+        positions = tuple(positional.index(name) for name in names if name in positional)
+    
+    def get_input(args: tuple, kwargs: dict) -> Optional[str]:
+        if args and isinstance(args[0], str):
+            return args[0]
+        for name in names:
+            value = kwargs.get(name)
+            if isinstance(value, str):
+                return value
+        for index in positions:
+            if index < len(args) and isinstance(args[index], str):
+                return args[index]
+        return None
+    
+    return get_input
+
+
 def guardrail(
     allowed_topics: Optional[List[str]] = None,
     blocked_patterns: Optional[List[str]] = None,
@@ -194,23 +379,21 @@ def guardrail(
         redirect_message=redirect_message,
     )
     
+    validate_input = rails.validate_input
+    
     def decorator(func: Callable) -> Callable:
+        # Find the user input (first string arg or 'input'/'query'/'message' kwarg)
+        get_input = _input_getter(func)
+        
+        # The decorator's Guardrails has no output validator, so its
+        # wrapper only validates input; output passes through unchecked
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Find the user input (first string arg or 'input'/'query'/'message' kwarg)
-            user_input = None
-            
-            if args and isinstance(args[0], str):
-                user_input = args[0]
-            else:
-                for key in ['input', 'query', 'message', 'user_input', 'text']:
-                    if key in kwargs and isinstance(kwargs[key], str):
-                        user_input = kwargs[key]
-                        break
+            user_input = get_input(args, kwargs)
             
             # Validate input if found
             if user_input:
-                is_valid, reason = rails.validate_input(user_input)
+                is_valid, reason = validate_input(user_input)
                 
                 if not is_valid:
                     result = rails.handle_violation(reason, user_input)
@@ -218,17 +401,7 @@ def guardrail(
                         return result
             
             # Execute the function
-            output = func(*args, **kwargs)
-            
-            # Validate output if it's a string
-            if isinstance(output, str):
-                is_valid, reason = rails.validate_output(output)
-                if not is_valid:
-                    result = rails.handle_violation(reason, output)
-                    if result is not None:
-                        return result
-            
-            return output
+            return func(*args, **kwargs)
         
         return wrapper
     return decorator
@@ -251,18 +424,21 @@ def check_guardrails(user_input: str) -> tuple[bool, Optional[str]]:
             # Otherwise, process normally
             result = agent_executor.invoke(user_query)
     """
-    agent = get_current_agent()
+    # Direct ContextVar read: no session or no guardrails costs one get
+    # and two None checks
+    agent = _current_agent_ctx.get()
     
-    if not agent:
+    if agent is None:
         return True, None  # No agent context, skip guardrails
     
-    if not hasattr(agent, 'guardrails') or agent.guardrails is None:
+    rails = agent.guardrails
+    if rails is None:
         return True, None  # No guardrails configured
     
-    is_valid, reason = agent.guardrails.validate_input(user_input)
+    is_valid, reason = rails.validate_input(user_input)
     
     if not is_valid:
-        result = agent.guardrails.handle_violation(reason, user_input)
+        result = rails.handle_violation(reason, user_input)
         return False, result
     
     return True, None
@@ -1,56 +1,86 @@
-from typing import Optional, ClassVar
+from typing import TYPE_CHECKING, Any, Optional, ClassVar
 import logging
-from .core import get_current_agent, logger, _log_action
+from .core import _current_agent_ctx, logger, _log_action
 from .guard import PermissionDeniedError
 
-try:
-    from pydantic import BaseModel, model_validator
-except ImportError:
-    raise ImportError("Pydantic is required for ScopedModel. Run `pip install pydantic`.")
-
-class ScopedModel(BaseModel):
-    """
-    A Pydantic Model that enforces agent permissions upon instantiation.
-    
-    Usage:
-        class RefundParams(ScopedModel):
-            order_id: str
-            
-            # Define the scope required to instantiate this model
-            _required_scope: ClassVar[str] = "write:refunds"
-            
-    """
-    # Using ClassVar to avoid Pydantic thinking it's a field
-    _required_scope: ClassVar[Optional[str]] = None
-
-    @model_validator(mode='after')
-    def check_permissions(self):
-        # 1. Check if a scope is defined on the class
-        required_scope = getattr(self, "_required_scope", None)
-        
-        if not required_scope:
-            return self
-
-        # 2. Identify Agent
-        agent = get_current_agent()
-        model_name = self.__class__.__name__
-        
-        if not agent:
-            logger.warning(f"BLOCK | ScopedModel '{model_name}' instantiated outside Agent Session.")
-            raise PermissionDeniedError(
-                f"ScopedModel '{model_name}' requires an active agent session. "
-                f"Use: with agent.start_session(): ..."
-            )
+__all__ = ["ScopedModel"]
+
+if TYPE_CHECKING:
+    # ScopedModel is built on first access (see __getattr__ below); this
+    # declaration lets type checkers resolve the import
+    from pydantic import BaseModel
+
+    class ScopedModel(BaseModel):
+        _required_scope: ClassVar[Optional[str]] = None
+
+
+def _build_scoped_model():
+    """Import Pydantic and define ScopedModel. Called on first access only."""
+    try:
+        from pydantic import BaseModel, model_validator
+    except ImportError:
+        raise ImportError("Pydantic is required for ScopedModel. Run `pip install pydantic`.")
+
+    class ScopedModel(BaseModel):
+        """
+        A Pydantic Model that enforces agent permissions upon instantiation.
+
+        Usage:
+            class RefundParams(ScopedModel):
+                order_id: str
+
+                # Define the scope required to instantiate this model
+                _required_scope: ClassVar[str] = "write:refunds"
+
+        """
+        # Using ClassVar to avoid Pydantic thinking it's a field
+        _required_scope: ClassVar[Optional[str]] = None
 
-        # 3. Enforce Scope
-        if not agent.has_scope(required_scope):
-            error_msg = (
+        @model_validator(mode='before')
+        @classmethod
+        def check_permissions(cls, data: Any) -> Any:
+            # Runs before field validation, so denied agents never pay for it.
+            # 1. Check if a scope is defined on the class (always present as
+            # a ClassVar, so no getattr default is needed)
+            required_scope = cls._required_scope
+
+            if not required_scope:
+                return data
+
+            # 2. Identify Agent (direct ContextVar read, no helper frame)
+            agent = _current_agent_ctx.get()
+
+            if not agent:
+                model_name = cls.__name__
+                logger.warning(f"BLOCK | ScopedModel '{model_name}' instantiated outside Agent Session.")
+                raise PermissionDeniedError(
+                    f"ScopedModel '{model_name}' requires an active agent session. "
+                    f"Use: with agent.start_session(): ..."
+                )
+
+            # 3. Enforce Scope
+            if agent.has_scope(required_scope):
+                # DEBUG is normally off: the level check skips the call
+                if logger.isEnabledFor(logging.DEBUG):
+                    _log_action("model_access_granted", agent, required_scope, cls.__name__, True, level=logging.DEBUG)
+                return data
+
+            # Denial message only built when it is raised
+            model_name = cls.__name__
+            _log_action("model_access_denied", agent, required_scope, model_name, False, level=logging.ERROR)
+            raise PermissionDeniedError(
                 f"Agent '{agent.name}' missing required scope: '{required_scope}' for model '{model_name}'. "
                 f"Agent has: {list(agent.scopes)}."
             )
-            
-            _log_action("model_access_denied", agent.id, agent.name, required_scope, model_name, False, level=logging.ERROR)
-            raise PermissionDeniedError(error_msg)
-            
-        _log_action("model_access_granted", agent.id, agent.name, required_scope, model_name, True, level=logging.DEBUG)
-        return self
+
+    ScopedModel.__qualname__ = "ScopedModel"
+    return ScopedModel
+
+
+def __getattr__(name: str):
+    # PEP 562: defer the Pydantic import (tens of ms) until ScopedModel is used
+    if name == "ScopedModel":
+        model = _build_scoped_model()
+        globals()["ScopedModel"] = model
+        return model
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,17 +4,93 @@ Slack Integration for AgentSudo
 Provides human-in-the-loop approval workflows via Slack.
 """
 
+import asyncio
 import os
+import secrets
 import time
-import json
 import threading
 import logging
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
 from typing import Optional, Dict, Any, Callable
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from ._http import connection_for
+from ._json import dumps as _dumps, loads as _loads
 
 logger = logging.getLogger("agentsudo.slack")
 
+_SLACK_POST_MESSAGE_URL = "https://slack.com/api/chat.postMessage"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Static parts of the approval message, shared by every request
+_HEADER_BLOCK = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "🔐 AgentSudo Approval Request",
+        "emoji": True
+    }
+}
+_DIVIDER_BLOCK = {"type": "divider"}
+_APPROVE_BUTTON = {
+    "type": "button",
+    "text": {
+        "type": "plain_text",
+        "text": "✅ Approve",
+        "emoji": True
+    },
+    "style": "primary",
+    "action_id": "approve",
+}
+_DENY_BUTTON = {
+    "type": "button",
+    "text": {
+        "type": "plain_text",
+        "text": "❌ Deny",
+        "emoji": True
+    },
+    "style": "danger",
+    "action_id": "deny",
+}
+
+# Fallback polling backs off from poll_interval / 8 to poll_interval * 5
+# (0.25s -> 10s by default): quick answers are seen quickly, slow ones
+# cost few requests
+_POLL_BACKOFF_START = 1 / 8
+_POLL_BACKOFF_FACTOR = 1.5
+_POLL_BACKOFF_MAX = 5
+
+# Longest time a single status request asks the cloud to hold open while
+# waiting for a decision (long polling, opt-in via cloud_long_poll)
+_LONG_POLL_SECONDS = 25
+
+# Socket timeout for a status request, on top of any long-poll wait
+_STATUS_TIMEOUT = 10
+
+
+def _send(
+    method: str,
+    url: str,
+    payload: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> bytes:
+    """
+    Send a request over the shared keep-alive connection for the URL's host
+    and return the response body. Error statuses raise HTTPError, as
+    urlopen did.
+    """
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    body = _dumps(payload) if payload is not None else None
+    status, data = connection_for(url).request(method, path, body, headers, timeout)
+    if status >= 400:
+        raise HTTPError(url, status, data[:200].decode("utf-8", "replace"), None, None)
+    return data
+
 
 class SlackApprovalTimeout(Exception):
     """Raised when an approval request times out."""
@@ -55,6 +131,7 @@ class SlackApproval:
         cloud_api_key: Optional[str] = None,
         cloud_url: str = "https://agentsudo.dev/api/slack",
         auto_deny_on_timeout: bool = True,
+        cloud_long_poll: bool = False,
     ):
         """
         Initialize Slack approval integration.
@@ -64,10 +141,15 @@ class SlackApproval:
             bot_token: Slack Bot Token (xoxb-...) for interactive messages
             channel: Channel to post approval requests (required with bot_token)
             timeout: Seconds to wait for approval (default: 300)
-            poll_interval: Seconds between polling for response (default: 2)
+            poll_interval: Base delay in seconds between cloud status polls; polls
+                           start at poll_interval / 8 and back off to
+                           poll_interval * 5 (default: 2)
             cloud_api_key: AgentSudo Cloud API key for managed approvals
             cloud_url: AgentSudo Cloud API URL
             auto_deny_on_timeout: If True, deny on timeout. If False, raise exception.
+            cloud_long_poll: Ask the cloud to hold each status request open until
+                             the approval is decided (?wait=<seconds>). Only enable
+                             this for a cloud endpoint that supports long polling.
         """
         self.webhook_url = webhook_url or os.environ.get("SLACK_WEBHOOK_URL")
         self.bot_token = bot_token or os.environ.get("SLACK_BOT_TOKEN")
@@ -77,9 +159,11 @@ class SlackApproval:
         self.cloud_api_key = cloud_api_key or os.environ.get("AGENTSUDO_API_KEY")
         self.cloud_url = cloud_url
         self.auto_deny_on_timeout = auto_deny_on_timeout
+        self.cloud_long_poll = cloud_long_poll
         
-        # In-memory store for local approvals (for testing/simple use cases)
-        self._pending_approvals: Dict[str, Optional[bool]] = {}
+        # In-memory store for local approvals (for testing/simple use cases);
+        # handle_interaction resolves the future and wakes the waiter at once
+        self._pending_approvals: Dict[str, Future] = {}
         self._approval_lock = threading.Lock()
         
         if not self.webhook_url and not self.bot_token and not self.cloud_api_key:
@@ -88,6 +172,38 @@ class SlackApproval:
                 "Set SLACK_WEBHOOK_URL, SLACK_BOT_TOKEN, or AGENTSUDO_API_KEY."
             )
     
+    # Request headers are built when a credential is set, not per request;
+    # the poll loop reuses them on every status check
+    
+    @property
+    def bot_token(self) -> Optional[str]:
+        """Slack Bot Token. Assigning it rebuilds the request headers."""
+        return self._bot_token
+    
+    @bot_token.setter
+    def bot_token(self, token: Optional[str]):
+        self._bot_token = token
+        self._bot_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+        }
+    
+    @property
+    def cloud_api_key(self) -> Optional[str]:
+        """AgentSudo Cloud API key. Assigning it rebuilds the request headers."""
+        return self._cloud_api_key
+    
+    @cloud_api_key.setter
+    def cloud_api_key(self, api_key: Optional[str]):
+        self._cloud_api_key = api_key
+        self._cloud_get_headers = {
+            "Authorization": f"Bearer {api_key}",
+        }
+        self._cloud_post_headers = {
+            "Content-Type": "application/json",
+            **self._cloud_get_headers,
+        }
+    
     def request_approval(self, agent, scope: str, context: Dict[str, Any]) -> bool:
         """
         Request approval via Slack. This is the callback for @sudo(on_deny=...).
@@ -100,20 +216,7 @@ class SlackApproval:
         Returns:
             True if approved, False if denied
         """
-        # Generate unique approval ID
-        import uuid
-        approval_id = str(uuid.uuid4())[:8]
-        
-        function_name = context.get("function", "unknown")
-        
-        # Build the approval message
-        message = self._build_approval_message(
-            approval_id=approval_id,
-            agent_name=agent.name,
-            scope=scope,
-            function_name=function_name,
-            context=context,
-        )
+        approval_id, message = self._new_approval(agent, scope, context)
         
         # Use Cloud API if available (supports interactive buttons)
         if self.cloud_api_key:
@@ -131,6 +234,73 @@ class SlackApproval:
         logger.error("Slack not configured. Denying approval request.")
         return False
     
+    async def arequest_approval(self, agent, scope: str, context: Dict[str, Any]) -> bool:
+        """
+        Async variant of request_approval for @sudo-decorated async functions.
+        
+        Waiting for the human response happens on the event loop, so a pending
+        approval doesn't tie up a worker thread for up to `timeout` seconds.
+        The short HTTP calls to Slack/Cloud run in the default executor.
+        
+        Usage:
+            @sudo(scope="delete:customer", on_deny=slack.arequest_approval)
+            async def delete_customer(customer_id: str):
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        approval_id, message = self._new_approval(agent, scope, context)
+        
+        if self.cloud_api_key:
+            # Same error handling as _request_cloud_approval
+            try:
+                cloud_approval_id = await loop.run_in_executor(
+                    None, self._post_cloud_approval, approval_id, agent, scope, context
+                )
+                return await self._apoll_cloud_approval(cloud_approval_id)
+            except Exception as e:
+                logger.error(f"Cloud approval request failed: {e}")
+                return False
+        
+        if self.bot_token:
+            decision = self._register_local_approval(approval_id)
+            try:
+                try:
+                    posted = await loop.run_in_executor(None, self._post_interactive_message, message)
+                except Exception as e:
+                    logger.error(f"Interactive approval request failed: {e}")
+                    posted = False
+                if not posted:
+                    return False
+                return await self._await_local_approval(approval_id, decision)
+            finally:
+                # Also reached when the awaiting task is cancelled
+                self._discard_local_approval(approval_id)
+        
+        if self.webhook_url:
+            return await loop.run_in_executor(
+                None, self._request_webhook_approval, approval_id, agent, scope, context, message
+            )
+        
+        logger.error("Slack not configured. Denying approval request.")
+        return False
+    
+    def _new_approval(self, agent, scope: str, context: Dict[str, Any]):
+        """Generate an approval ID and its Slack message."""
+        # Generate unique approval ID (8 hex chars, as before)
+        approval_id = secrets.token_hex(4)
+        
+        function_name = context.get("function", "unknown")
+        
+        # Build the approval message
+        message = self._build_approval_message(
+            approval_id=approval_id,
+            agent_name=agent.name,
+            scope=scope,
+            function_name=function_name,
+            context=context,
+        )
+        return approval_id, message
+    
     def _build_approval_message(
         self,
         approval_id: str,
@@ -140,16 +310,11 @@ class SlackApproval:
         context: Dict[str, Any],
     ) -> Dict[str, Any]:
         """Build Slack Block Kit message for approval request."""
+        # Only the per-request text is built here; the static blocks are
+        # shared module-level constants (never mutated, only serialized)
         return {
             "blocks": [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🔐 AgentSudo Approval Request",
-                        "emoji": True
-                    }
-                },
+                _HEADER_BLOCK,
                 {
                     "type": "section",
                     "fields": [
@@ -180,35 +345,13 @@ class SlackApproval:
                         }
                     ]
                 },
-                {
-                    "type": "divider"
-                },
+                _DIVIDER_BLOCK,
                 {
                     "type": "actions",
                     "block_id": f"approval_{approval_id}",
                     "elements": [
-                        {
-                            "type": "button",
-                            "text": {
-                                "type": "plain_text",
-                                "text": "✅ Approve",
-                                "emoji": True
-                            },
-                            "style": "primary",
-                            "action_id": "approve",
-                            "value": approval_id
-                        },
-                        {
-                            "type": "button",
-                            "text": {
-                                "type": "plain_text",
-                                "text": "❌ Deny",
-                                "emoji": True
-                            },
-                            "style": "danger",
-                            "action_id": "deny",
-                            "value": approval_id
-                        }
+                        {**_APPROVE_BUTTON, "value": approval_id},
+                        {**_DENY_BUTTON, "value": approval_id},
                     ]
                 }
             ]
@@ -224,32 +367,7 @@ class SlackApproval:
     ) -> bool:
         """Request approval via AgentSudo Cloud (managed Slack integration)."""
         try:
-            payload = {
-                "approval_id": approval_id,
-                "agent_name": agent.name,
-                "agent_id": agent.id,
-                "scope": scope,
-                "function": context.get("function", "unknown"),
-                "timeout": self.timeout,
-                "channel": self.channel,
-            }
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.cloud_api_key}",
-            }
-            
-            # Send approval request to cloud
-            req = Request(
-                f"{self.cloud_url}/approvals",
-                data=json.dumps(payload).encode("utf-8"),
-                headers=headers,
-                method="POST",
-            )
-            
-            with urlopen(req, timeout=10) as response:
-                result = json.loads(response.read().decode("utf-8"))
-                cloud_approval_id = result.get("id")
+            cloud_approval_id = self._post_cloud_approval(approval_id, agent, scope, context)
             
             # Poll for response
             return self._poll_cloud_approval(cloud_approval_id)
@@ -258,41 +376,121 @@ class SlackApproval:
             logger.error(f"Cloud approval request failed: {e}")
             return False
     
-    def _poll_cloud_approval(self, cloud_approval_id: str) -> bool:
-        """Poll AgentSudo Cloud for approval response."""
-        start_time = time.time()
+    def _post_cloud_approval(self, approval_id: str, agent, scope: str, context: Dict[str, Any]) -> str:
+        """Create the approval on AgentSudo Cloud and return its cloud ID."""
+        payload = {
+            "approval_id": approval_id,
+            "agent_name": agent.name,
+            "agent_id": agent.id,
+            "scope": scope,
+            "function": context.get("function", "unknown"),
+            "timeout": self.timeout,
+            "channel": self.channel,
+        }
         
-        while time.time() - start_time < self.timeout:
-            try:
-                headers = {
-                    "Authorization": f"Bearer {self.cloud_api_key}",
-                }
-                
-                req = Request(
-                    f"{self.cloud_url}/approvals/{cloud_approval_id}",
-                    headers=headers,
-                    method="GET",
-                )
+        # Send approval request to cloud
+        result = _loads(_send("POST", f"{self.cloud_url}/approvals", payload, self._cloud_post_headers))
+        return result.get("id")
+    
+    def _fetch_cloud_status(
+        self, cloud_approval_id: str, wait: int = 0, timeout: float = _STATUS_TIMEOUT
+    ) -> Optional[bool]:
+        """
+        Check an approval once. Returns True/False when decided, None while pending.
+        
+        With wait > 0 the cloud may hold the request open for up to that many
+        seconds until the approval is decided (long polling).
+        """
+        url = f"{self.cloud_url}/approvals/{cloud_approval_id}"
+        if wait:
+            url += f"?wait={wait}"
+        try:
+            result = _loads(_send("GET", url, headers=self._cloud_get_headers, timeout=timeout))
+            status = result.get("status")
+            
+            if status == "approved":
+                logger.info(f"Approval {cloud_approval_id} approved via Slack")
+                return True
+            elif status == "denied":
+                logger.info(f"Approval {cloud_approval_id} denied via Slack")
+                return False
+            # status == "pending" - continue polling
                 
-                with urlopen(req, timeout=10) as response:
-                    result = json.loads(response.read().decode("utf-8"))
-                    status = result.get("status")
-                    
-                    if status == "approved":
-                        logger.info(f"Approval {cloud_approval_id} approved via Slack")
-                        return True
-                    elif status == "denied":
-                        logger.info(f"Approval {cloud_approval_id} denied via Slack")
-                        return False
-                    # status == "pending" - continue polling
-                    
-            except Exception as e:
-                logger.warning(f"Error polling approval status: {e}")
+        except Exception as e:
+            logger.warning(f"Error polling approval status: {e}")
+        
+        return None
+    
+    def _status_request(self, remaining: float):
+        """
+        The (wait, timeout) for the next status request: how long the cloud
+        may hold it open (0 unless long polling is enabled), and a socket
+        timeout that never runs past the approval deadline.
+        """
+        wait = max(1, min(_LONG_POLL_SECONDS, int(remaining))) if self.cloud_long_poll else 0
+        return wait, min(wait + _STATUS_TIMEOUT, remaining)
+    
+    def _poll_delays(self, deadline: float):
+        """Exponentially growing delays between polls, never past the deadline."""
+        delay = self.poll_interval * _POLL_BACKOFF_START
+        longest = self.poll_interval * _POLL_BACKOFF_MAX
+        while True:
+            yield max(0.0, min(delay, deadline - time.monotonic()))
+            delay = min(delay * _POLL_BACKOFF_FACTOR, longest)
+    
+    def _poll_cloud_approval(self, cloud_approval_id: str) -> bool:
+        """
+        Wait for the approval response from AgentSudo Cloud.
+        
+        Status is polled with exponential backoff (see _poll_delays). With
+        cloud_long_poll, each request instead asks the cloud to hold it open
+        until the approval is decided, and backoff only applies when the
+        server answers "pending" straight away.
+        """
+        deadline = time.monotonic() + self.timeout
+        delays = self._poll_delays(deadline)
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait, timeout = self._status_request(remaining)
+            sent_at = time.monotonic()
+            decision = self._fetch_cloud_status(cloud_approval_id, wait, timeout)
+            if decision is not None:
+                return decision
             
-            time.sleep(self.poll_interval)
+            if time.monotonic() - sent_at < wait or not wait:
+                time.sleep(next(delays))
+        
+        return self._handle_timeout(cloud_approval_id)
+    
+    async def _apoll_cloud_approval(self, cloud_approval_id: str) -> bool:
+        """Async counterpart of _poll_cloud_approval; sleeps on the event loop."""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.timeout
+        delays = self._poll_delays(deadline)
         
-        # Timeout
-        logger.warning(f"Approval {cloud_approval_id} timed out after {self.timeout}s")
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait, timeout = self._status_request(remaining)
+            sent_at = time.monotonic()
+            decision = await loop.run_in_executor(
+                None, self._fetch_cloud_status, cloud_approval_id, wait, timeout
+            )
+            if decision is not None:
+                return decision
+            
+            if time.monotonic() - sent_at < wait or not wait:
+                await asyncio.sleep(next(delays))
+        
+        return self._handle_timeout(cloud_approval_id)
+    
+    def _handle_timeout(self, approval_id: str) -> bool:
+        """Deny or raise once an approval has timed out."""
+        logger.warning(f"Approval {approval_id} timed out after {self.timeout}s")
         if self.auto_deny_on_timeout:
             return False
         raise SlackApprovalTimeout(f"Approval request timed out after {self.timeout} seconds")
@@ -306,41 +504,35 @@ class SlackApproval:
         message: Dict[str, Any],
     ) -> bool:
         """Request approval using Slack Bot Token with interactive buttons."""
+        # Registered before posting so an immediate click is never missed
+        decision = self._register_local_approval(approval_id)
         try:
-            # Post message to Slack
-            payload = {
-                "channel": self.channel,
-                **message,
-            }
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.bot_token}",
-            }
-            
-            req = Request(
-                "https://slack.com/api/chat.postMessage",
-                data=json.dumps(payload).encode("utf-8"),
-                headers=headers,
-                method="POST",
-            )
-            
-            with urlopen(req, timeout=10) as response:
-                result = json.loads(response.read().decode("utf-8"))
-                if not result.get("ok"):
-                    logger.error(f"Slack API error: {result.get('error')}")
-                    return False
-            
-            # Initialize pending approval
-            with self._approval_lock:
-                self._pending_approvals[approval_id] = None
+            try:
+                posted = self._post_interactive_message(message)
+            except Exception as e:
+                logger.error(f"Interactive approval request failed: {e}")
+                posted = False
+            if not posted:
+                return False
             
             # Wait for response (set via handle_interaction)
-            return self._wait_for_local_approval(approval_id)
-            
-        except Exception as e:
-            logger.error(f"Interactive approval request failed: {e}")
+            return self._wait_for_local_approval(approval_id, decision)
+        finally:
+            self._discard_local_approval(approval_id)
+    
+    def _post_interactive_message(self, message: Dict[str, Any]) -> bool:
+        """Post the approval message with the bot token. Returns False on Slack API errors."""
+        # Post message to Slack
+        payload = {
+            "channel": self.channel,
+            **message,
+        }
+        
+        result = _loads(_send("POST", _SLACK_POST_MESSAGE_URL, payload, self._bot_headers))
+        if not result.get("ok"):
+            logger.error(f"Slack API error: {result.get('error')}")
             return False
+        return True
     
     def _request_webhook_approval(
         self,
@@ -370,15 +562,7 @@ class SlackApproval:
                 "blocks": message["blocks"][:-1],  # Remove actions block
             }
             
-            req = Request(
-                self.webhook_url,
-                data=json.dumps(notification).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            
-            with urlopen(req, timeout=10):
-                pass
+            _send("POST", self.webhook_url, notification, _JSON_HEADERS)
             
             logger.warning(
                 f"Approval request {approval_id} sent via webhook. "
@@ -390,27 +574,38 @@ class SlackApproval:
             logger.error(f"Webhook approval request failed: {e}")
             return False
     
-    def _wait_for_local_approval(self, approval_id: str) -> bool:
-        """Wait for approval response (for local/testing scenarios)."""
-        start_time = time.time()
-        
-        while time.time() - start_time < self.timeout:
-            with self._approval_lock:
-                result = self._pending_approvals.get(approval_id)
-                if result is not None:
-                    del self._pending_approvals[approval_id]
-                    return result
-            
-            time.sleep(self.poll_interval)
-        
-        # Timeout - clean up
+    def _register_local_approval(self, approval_id: str) -> Future:
+        """Create the future that handle_interaction resolves for this approval."""
+        decision: Future = Future()
+        with self._approval_lock:
+            self._pending_approvals[approval_id] = decision
+        return decision
+    
+    def _discard_local_approval(self, approval_id: str) -> None:
+        """Forget a local approval that is no longer being waited on."""
         with self._approval_lock:
             self._pending_approvals.pop(approval_id, None)
-        
-        logger.warning(f"Approval {approval_id} timed out after {self.timeout}s")
-        if self.auto_deny_on_timeout:
-            return False
-        raise SlackApprovalTimeout(f"Approval request timed out after {self.timeout} seconds")
+    
+    def _local_timeout(self, approval_id: str, decision: Future) -> bool:
+        """Drop a timed-out local approval, unless a decision raced the timeout."""
+        self._discard_local_approval(approval_id)
+        if decision.done() and not decision.cancelled():
+            return decision.result()
+        return self._handle_timeout(approval_id)
+    
+    def _wait_for_local_approval(self, approval_id: str, decision: Future) -> bool:
+        """Wait for approval response (for local/testing scenarios)."""
+        try:
+            return decision.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            return self._local_timeout(approval_id, decision)
+    
+    async def _await_local_approval(self, approval_id: str, decision: Future) -> bool:
+        """Async counterpart of _wait_for_local_approval; waits on the event loop."""
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(decision), self.timeout)
+        except asyncio.TimeoutError:
+            return self._local_timeout(approval_id, decision)
     
     def handle_interaction(self, approval_id: str, approved: bool, user: str = "unknown") -> bool:
         """
@@ -428,11 +623,16 @@ class SlackApproval:
             True if the approval was found and updated, False otherwise
         """
         with self._approval_lock:
-            if approval_id in self._pending_approvals:
-                self._pending_approvals[approval_id] = approved
-                action = "approved" if approved else "denied"
-                logger.info(f"Approval {approval_id} {action} by {user}")
-                return True
+            decision = self._pending_approvals.pop(approval_id, None)
+            if decision is not None:
+                try:
+                    decision.set_result(approved)
+                except InvalidStateError:
+                    pass  # The waiter gave up (timed out) first
+                else:
+                    action = "approved" if approved else "denied"
+                    logger.info(f"Approval {approval_id} {action} by {user}")
+                    return True
         
         logger.warning(f"Approval {approval_id} not found (may have expired)")
         return False
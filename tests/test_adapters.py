@@ -39,11 +39,129 @@ class TestFastAPIRegistry:
         # Unknown agent
         assert get_agent("unknown") is None
 
+    @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
+    def test_unregister_agent(self):
+        """Unregistered agents are no longer found."""
+        from agentsudo.adapters.fastapi import register_agent, unregister_agent, get_agent
+        
+        agent = Agent(name="TempBot", scopes=["read:*"])
+        register_agent(agent, "temp-001")
+        
+        assert unregister_agent("temp-001") is agent
+        assert get_agent("temp-001") is None
+        assert unregister_agent("temp-001") is None
+
+
+    @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
+    def test_require_scope_is_memoized(self):
+        """Identical scopes share one dependency callable."""
+        from agentsudo.adapters.fastapi import require_scope
+        
+        assert require_scope("read:weather") is require_scope("read:weather")
+        assert require_scope("read:weather") is not require_scope("read:data")
+        assert require_scope("read:weather", "log") is require_scope("read:weather", "log")
+
+    @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
+    def test_require_scope_accepts_unhashable_callback(self):
+        """Callable on_deny values are not cached, so they need not be hashable."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI, Depends
+        from agentsudo.adapters.fastapi import AgentSudoMiddleware, register_agent, require_scope
+        
+        class Approver:
+            __hash__ = None  # e.g. a dataclass with eq=True
+            def __init__(self):
+                self.calls = []
+            def __call__(self, agent, scope, context):
+                self.calls.append(scope)
+                return True
+        
+        approver = Approver()
+        dependency = require_scope("write:refunds", on_deny=approver)
+        assert dependency is not require_scope("write:refunds", on_deny=approver)
+        
+        app = FastAPI()
+        app.add_middleware(AgentSudoMiddleware)
+        
+        @app.post("/refunds")
+        async def refund(agent: Agent = Depends(dependency)):
+            return {"agent": agent.name}
+        
+        register_agent(Agent(name="Reader", scopes=["read:*"]), "reader-unhashable")
+        response = TestClient(app).post("/refunds", headers={"X-Agent-ID": "reader-unhashable"})
+        assert response.status_code == 200
+        assert approver.calls == ["write:refunds"]
+
+    @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
+    def test_sudo_endpoint_decorator_is_memoized(self):
+        """Identical scopes share one decorator but not the wrapper."""
+        from agentsudo.adapters.fastapi import sudo_endpoint
+        
+        decorator = sudo_endpoint("read:weather")
+        assert decorator is sudo_endpoint("read:weather")
+        
+        async def first(request): ...
+        async def second(request): ...
+        
+        assert decorator(first) is not decorator(second)
+
+    @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
+    def test_sudo_endpoint_accepts_unhashable_callback(self):
+        """Callable on_deny values are not cached, so they need not be hashable."""
+        from agentsudo.adapters.fastapi import sudo_endpoint
+        
+        class Approver:
+            __hash__ = None
+            def __call__(self, agent, scope, context):
+                return False
+        
+        approver = Approver()
+        assert sudo_endpoint("write:refunds", on_deny=approver) is not sudo_endpoint(
+            "write:refunds", on_deny=approver
+        )
+
 
 @pytest.mark.skipif(not _fastapi_available(), reason="FastAPI not installed")
 class TestFastAPIIntegration:
     """Integration tests for FastAPI adapter."""
     
+    def test_async_callbacks_are_awaited(self):
+        """An async on_deny decides the request; its coroutine is not approval."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI, Depends, Request
+        from agentsudo.adapters.fastapi import (
+            AgentSudoMiddleware, register_agent, require_scope, sudo_endpoint,
+        )
+        
+        async def reject(agent, scope, context):
+            return False
+        
+        async def approve(agent, scope, context):
+            return True
+        
+        app = FastAPI()
+        app.add_middleware(AgentSudoMiddleware)
+        register_agent(Agent(name="Reader", scopes=["read:*"]), "reader-async-cb")
+        
+        @app.post("/rejected")
+        async def rejected(agent: Agent = Depends(require_scope("write:refunds", on_deny=reject))):
+            return {}
+        
+        @app.post("/approved")
+        async def approved(agent: Agent = Depends(require_scope("write:refunds", on_deny=approve))):
+            return {}
+        
+        @app.post("/decorated")
+        @sudo_endpoint("write:refunds", on_deny=reject)
+        async def decorated(request: Request):
+            return {}
+        
+        client = TestClient(app)
+        headers = {"X-Agent-ID": "reader-async-cb"}
+        assert client.post("/rejected", headers=headers).status_code == 403
+        assert client.post("/approved", headers=headers).status_code == 200
+        assert client.post("/decorated", headers=headers).status_code == 403
+    
     @pytest.fixture
     def reader_agent(self):
         return Agent(name="ReaderBot", scopes=["read:data", "read:weather"])
@@ -81,3 +199,119 @@ class TestFastAPIIntegration:
         response = client.get("/weather", headers={"X-Agent-ID": "reader-001"})
         assert response.status_code == 200
         assert response.json()["agent"] == "ReaderBot"
+
+    def test_middleware_session_reaches_sudo_tools(self, reader_agent):
+        """@sudo functions called from an endpoint see the middleware's agent."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI
+        from agentsudo import sudo
+        from agentsudo.adapters.fastapi import AgentSudoMiddleware, register_agent
+        
+        @sudo(scope="read:weather")
+        def get_weather():
+            return "sunny"
+        
+        app = FastAPI()
+        register_agent(reader_agent, "reader-003")
+        app.add_middleware(AgentSudoMiddleware)
+        
+        @app.get("/weather")
+        def weather():
+            return {"weather": get_weather()}
+        
+        response = TestClient(app).get("/weather", headers={"X-Agent-ID": "reader-003"})
+        assert response.status_code == 200
+        assert response.json() == {"weather": "sunny"}
+    
+    def test_middleware_header_name_is_case_insensitive(self, reader_agent):
+        """The raw header scan matches any spelling of the header name."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI, Request
+        from agentsudo.adapters.fastapi import AgentSudoMiddleware, register_agent
+        
+        app = FastAPI()
+        register_agent(reader_agent, "reader-004")
+        app.add_middleware(AgentSudoMiddleware, agent_header="X-Agent-ID")
+        
+        @app.get("/whoami")
+        async def whoami(request: Request):
+            return {"agent": request.state.agent.name}
+        
+        client = TestClient(app)
+        for name in ("X-Agent-ID", "x-agent-id", "X-AGENT-ID"):
+            response = client.get("/whoami", headers={name: "reader-004"})
+            assert response.json() == {"agent": "ReaderBot"}
+        
+        # An empty header counts as missing
+        assert client.get("/whoami", headers={"X-Agent-ID": ""}).status_code == 401
+    
+    def test_middleware_rejection_bodies(self):
+        """401 responses name the missing header or the unknown agent."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI
+        from agentsudo.adapters.fastapi import AgentSudoMiddleware
+        
+        app = FastAPI()
+        app.add_middleware(AgentSudoMiddleware, agent_header="X-Agent-ID")
+        
+        @app.get("/")
+        async def root():
+            return {}
+        
+        client = TestClient(app)
+        response = client.get("/")
+        assert response.status_code == 401
+        assert response.text == "Missing required header: X-Agent-ID"
+        response = client.get("/", headers={"X-Agent-ID": "nobody"})
+        assert response.status_code == 401
+        assert response.text == "Unknown agent: nobody"
+    
+    def test_middleware_allows_missing_header(self):
+        """on_missing_agent='allow' passes requests through without an agent."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI, Request
+        from agentsudo.adapters.fastapi import AgentSudoMiddleware
+        
+        app = FastAPI()
+        app.add_middleware(AgentSudoMiddleware, on_missing_agent="allow")
+        
+        @app.get("/health")
+        async def health(request: Request):
+            return {"agent": getattr(request.state, "agent", None)}
+        
+        response = TestClient(app).get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"agent": None}
+
+    def test_agent_context_require_all(self, reader_agent):
+        """require_all passes only when every scope is granted."""
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI, Request
+        from agentsudo.adapters.fastapi import (
+            AgentSudoMiddleware,
+            AgentContext,
+            register_agent,
+        )
+        
+        app = FastAPI()
+        register_agent(reader_agent, "reader-002")
+        app.add_middleware(AgentSudoMiddleware, agent_header="X-Agent-ID")
+        
+        @app.get("/read")
+        async def read(request: Request):
+            with AgentContext(request).require_all(["read:data", "read:weather"]):
+                return {"ok": True}
+        
+        @app.get("/write")
+        async def write(request: Request):
+            with AgentContext(request).require_all(["read:data", "write:logs"]):
+                return {"ok": True}
+        
+        client = TestClient(app)
+        headers = {"X-Agent-ID": "reader-002"}
+        
+        assert client.get("/read", headers=headers).status_code == 200
+        
+        response = client.get("/write", headers=headers)
+        assert response.status_code == 403
+        assert "write:logs" in response.json()["detail"]
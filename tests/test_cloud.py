@@ -0,0 +1,167 @@
+import json
+import logging
+
+import pytest
+from agentsudo.cloud import CloudConfig
+
+
+class FakeConnection:
+    """Stands in for KeepAliveConnection and records every POST."""
+
+    timeout = 10.0
+
+    def __init__(self, status=200, error=None):
+        self.status = status
+        self.error = error
+        self.batches = []
+        self.headers = []
+        self.closed = False
+
+    def request(self, method, path, body=None, headers=None, timeout=None):
+        if self.error is not None:
+            raise self.error
+        self.batches.append(json.loads(body))
+        self.headers.append(headers)
+        return self.status, b""
+
+    def close(self):
+        self.closed = True
+
+
+def make_config(conn, **kwargs):
+    """A queueing CloudConfig whose worker is stopped, so tests drive sends."""
+    kwargs.setdefault("flush_interval", 3600)
+    config = CloudConfig(api_key="test", **kwargs)
+    config._stop_event.set()
+    config._wakeup.set()
+    config._worker_thread.join()
+    config._http = conn
+    return config
+
+
+def event(i):
+    return {"agent_name": "Bot", "action": "permission_check", "allowed": True, "n": i}
+
+
+def test_full_queue_evicts_oldest_and_counts_drops(caplog):
+    conn = FakeConnection()
+    config = make_config(conn, batch_size=2, max_queue_size=3)
+
+    for i in range(5):
+        config.send_event(event(i))
+
+    assert config.stats() == {"queued": 3, "dropped": 2, "max_queue_size": 3}
+    with caplog.at_level(logging.WARNING, logger="agentsudo.cloud"):
+        config.flush()
+
+    sent = [e["n"] for batch in conn.batches for e in batch]
+    assert sent == [2, 3, 4]
+    # Drops are reported locally, never mixed into a batch of real events
+    assert all("agent_name" in e for batch in conn.batches for e in batch)
+    assert "dropped 2 oldest events" in caplog.text
+    assert config.stats()["queued"] == 0
+
+
+def test_shutdown_with_failing_endpoint_stops_after_first_failure():
+    conn = FakeConnection(error=ConnectionRefusedError("down"))
+    config = make_config(conn, batch_size=10)
+
+    for i in range(1000):
+        config.send_event(event(i))
+    config.shutdown()
+
+    assert conn.closed
+    # One attempt, not a hundred: the remaining events are abandoned
+    assert config.stats()["queued"] == 990
+
+
+def test_shutdown_flush_respects_time_budget(monkeypatch):
+    import agentsudo.cloud as cloud
+    conn = FakeConnection()
+    config = make_config(conn, batch_size=1)
+    for i in range(5):
+        config.send_event(event(i))
+
+    # Each send takes 1s of (fake) time against a 2.5s budget
+    now = [0.0]
+    monkeypatch.setattr(cloud.time, "monotonic", lambda: now[0])
+    original = conn.request
+    def slow_request(*args, **kwargs):
+        now[0] += 1.0
+        return original(*args, **kwargs)
+    conn.request = slow_request
+
+    config.shutdown(timeout=2.5)
+
+    assert len(conn.batches) == 3
+    assert config.stats()["queued"] == 2
+
+
+def test_flush_sends_in_batch_size_chunks():
+    conn = FakeConnection()
+    config = make_config(conn, batch_size=4)
+
+    for i in range(10):
+        config.send_event(event(i))
+    config.flush()
+
+    assert [len(batch) for batch in conn.batches] == [4, 4, 2]
+
+
+def test_reassigned_api_key_is_sent():
+    conn = FakeConnection()
+    config = make_config(conn)
+    config.api_key = "rotated"
+
+    config.send_event(event(1))
+    config.flush()
+
+    assert conn.headers[0]["X-API-Key"] == "rotated"
+
+
+def test_sync_mode_sends_each_event():
+    conn = FakeConnection()
+    config = CloudConfig(api_key="test", async_send=False)
+    config._http = conn
+
+    config.send_event(event(1))
+
+    assert conn.batches == [[event(1)]]
+
+
+def test_worker_sends_full_batch_without_waiting_for_interval():
+    import threading
+    sent = threading.Event()
+    conn = FakeConnection()
+    original = conn.request
+    def request(*args, **kwargs):
+        result = original(*args, **kwargs)
+        sent.set()
+        return result
+    conn.request = request
+
+    config = CloudConfig(api_key="test", batch_size=3, flush_interval=3600)
+    config._http = conn
+    try:
+        for i in range(3):
+            config.send_event(event(i))
+        assert sent.wait(timeout=5)
+        assert [e["n"] for e in conn.batches[0]] == [0, 1, 2]
+    finally:
+        config.shutdown()
+
+
+def test_worker_sends_partial_batch_at_flush_interval():
+    import time
+    conn = FakeConnection()
+    config = CloudConfig(api_key="test", batch_size=100, flush_interval=0.05)
+    config._http = conn
+    try:
+        config.send_event(event(1))
+        for _ in range(100):
+            if conn.batches:
+                break
+            time.sleep(0.01)
+        assert conn.batches == [[event(1)]]
+    finally:
+        config.shutdown()
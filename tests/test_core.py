@@ -37,3 +37,211 @@ def test_nested_sessions():
             
         # Should return to Bot1
         assert get_current_agent().name == "Bot1"
+
+def test_scope_mutation_invalidates_cache():
+    agent = Agent(name="MutableBot", scopes=["read:*"])
+    assert agent.has_scope("read:db")
+    assert not agent.has_scope("write:db")
+
+    agent.scopes.add("write:db")
+    assert agent.has_scope("write:db")
+
+    agent.scopes.discard("read:*")
+    assert not agent.has_scope("read:db")
+
+def test_scopes_copy_and_pickle():
+    import copy
+    import pickle
+    agent = Agent(name="CopyBot", scopes=["read:*"])
+
+    # A copied or unpickled scope set is a plain set, detached from the agent
+    for scopes in (copy.copy(agent.scopes), copy.deepcopy(agent.scopes),
+                   pickle.loads(pickle.dumps(agent.scopes))):
+        assert type(scopes) is set and scopes == {"read:*"}
+        scopes.add("write:db")
+        assert not agent.has_scope("write:db")
+
+    for clone in (copy.copy(agent), copy.deepcopy(agent), pickle.loads(pickle.dumps(agent))):
+        assert (clone.id, clone.name, clone.scopes) == (agent.id, agent.name, {"read:*"})
+        clone.scopes.add("write:db")
+        assert clone.has_scope("write:db")
+        assert not agent.has_scope("write:db")
+
+def test_wildcard_matching_agrees_with_fnmatch():
+    import fnmatch
+    patterns = [
+        "read:*", "admin:users:*", "write:orders", "read:orders*", "*:audit",
+        "*tmp*", "admin:*:delete", "del?te:x", "*",
+    ]
+    required = [
+        "read:db", "read:", "read", "read:a:b", "admin:users:1", "admin:users",
+        "admin:roles:1", "write:orders", "write:orders:1", "read:orders2",
+        "logs:audit", "delete:x", "dele:x", "", "anything", "write:tmp:1",
+        "admin:users:delete", "admin:users:read",
+    ]
+    for pattern in patterns:
+        agent = Agent(name="MatchBot", scopes=[pattern])
+        for scope in required:
+            assert agent.has_scope(scope) == fnmatch.fnmatchcase(scope, pattern), (pattern, scope)
+
+def test_multiple_complex_patterns_agree_with_fnmatch():
+    import fnmatch
+    patterns = ["admin:*:delete", "del?te:x", "[rw]*:logs"]
+    agent = Agent(name="ComplexBot", scopes=patterns)
+    for scope in ["admin:users:delete", "delete:x", "read:logs", "write:app:logs", "exec:logs", "admin:delete"]:
+        expected = any(fnmatch.fnmatchcase(scope, p) for p in patterns)
+        assert agent.has_scope(scope) == expected, scope
+
+def test_denial_cache_cleared_on_grant():
+    agent = Agent(name="RetryBot", scopes=["read:db"])
+    assert not agent.has_scope("write:refunds")
+    assert not agent.has_scope("write:refunds")
+
+    agent.scopes.add("write:*")
+    assert agent.has_scope("write:refunds")
+
+def test_sessions_isolated_between_async_tasks():
+    import asyncio
+
+    async def run_as(agent, started, release):
+        with agent.start_session():
+            started.set()
+            await release.wait()
+            return get_current_agent().name
+
+    async def main():
+        started_a, started_b, release = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        task_a = asyncio.create_task(run_as(Agent(name="A", scopes=[]), started_a, release))
+        task_b = asyncio.create_task(run_as(Agent(name="B", scopes=[]), started_b, release))
+        await started_a.wait()
+        await started_b.wait()
+        release.set()
+        return await task_a, await task_b
+
+    assert asyncio.run(main()) == ("A", "B")
+
+def test_scope_change_during_check_does_not_poison_shared_cache(monkeypatch):
+    from agentsudo._scope_matcher import ScopeMatcher
+    # Scopes no other test uses, so the shared matchers start out cold
+    bystander = Agent(name="Bystander", scopes=["read:ledger"])
+    agent = Agent(name="Revoked", scopes=["read:ledger", "pay:*"])
+
+    original = ScopeMatcher.match
+    revoked = []
+    def match(self, required_scope):
+        # Revoke while the old matcher is still deciding
+        monkeypatch.setattr(ScopeMatcher, "match", original)
+        agent.scopes.discard("pay:*")
+        revoked.append(required_scope)
+        return original(self, required_scope)
+    monkeypatch.setattr(ScopeMatcher, "match", match)
+
+    agent.has_scope("pay:refunds")
+
+    assert revoked == ["pay:refunds"]
+    assert not agent.has_scope("pay:refunds")
+    assert not bystander.has_scope("pay:refunds")
+
+def test_check_all():
+    agent = Agent(name="BatchBot", scopes=["read:*", "write:logs"])
+    assert agent.check_all(["read:data", "write:logs", "delete:data"]) == [True, True, False]
+
+def test_identical_scope_sets_share_matcher():
+    a = Agent(name="A", scopes=["read:*", "write:orders"])
+    b = Agent(name="B", scopes=["write:orders", "read:*"])
+    assert a._matcher is b._matcher
+
+    # Mutating one agent must not affect the other
+    a.scopes.add("delete:orders")
+    assert a.has_scope("delete:orders")
+    assert not b.has_scope("delete:orders")
+
+def test_decision_cache_is_bounded():
+    from agentsudo._scope_matcher import DECISION_CACHE_LIMIT
+    agent = Agent(name="TenantBot", scopes=["read:tenant:*"])
+    for i in range(DECISION_CACHE_LIMIT + 10):
+        assert agent.has_scope(f"read:tenant:{i}")
+        assert not agent.has_scope(f"write:tenant:{i}")
+    assert len(agent._granted) <= DECISION_CACHE_LIMIT
+    assert len(agent._denied) <= DECISION_CACHE_LIMIT
+
+def test_star_scope_grants_everything_without_caching():
+    agent = Agent(name="AdminBot", scopes=["*"])
+    assert agent.has_scope("delete:everything")
+    assert agent.check_all(["read:db", "write:db"]) == [True, True]
+    assert agent._granted == {"*"}
+    agent.scopes.discard("*")
+    assert not agent.has_scope("read:db")
+
+def test_literal_scopes_are_pre_granted():
+    agent = Agent(name="LiteralBot", scopes=["read:db", "write:db"])
+    assert {"read:db", "write:db"} <= agent._granted
+    assert not agent.has_scope("delete:db")
+    assert "delete:db" in agent._denied
+
+def test_literal_only_scopes_compile_no_patterns():
+    agent = Agent(name="LiteralBot", scopes=["read:db", "write:db"])
+    assert not agent._matcher.has_wildcards
+    assert agent._matcher.patterns is None
+
+def test_many_wildcard_scopes_compile_to_one_regex():
+    scopes = ["delete:*"] + [f"admin:{i}:*:purge" for i in range(50)]
+    agent = Agent(name="ManyBot", scopes=scopes)
+    assert agent._matcher.patterns is not None  # one combined matcher
+    assert agent.has_scope("delete:customer")
+    assert agent.has_scope("admin:49:users:purge")
+    assert not agent.has_scope("admin:50:users:purge")
+
+def test_log_action_emits_json_record(caplog):
+    import json
+    import logging
+    from agentsudo.core import _log_action
+    agent = Agent(name='Quote "Bot"', scopes=[])
+    with caplog.at_level(logging.WARNING, logger="agentsudo"):
+        _log_action("audit_violation", agent, "write:db", "save", False, level=logging.WARNING)
+        agent.name = "Renamed"
+        _log_action("audit_violation", agent, "write:db", "save", False, level=logging.WARNING)
+    first, second = (json.loads(r.getMessage()) for r in caplog.records)
+    assert list(first) == ["timestamp", "action", "agent_id", "agent_name", "scope", "function", "allowed"]
+    assert first["agent_name"] == 'Quote "Bot"'
+    assert first["agent_id"] == agent.id
+    assert first["allowed"] is False
+    assert second["agent_name"] == "Renamed"
+
+def test_log_action_skips_disabled_levels(caplog):
+    import logging
+    from agentsudo.core import _log_action
+    agent = Agent(name="QuietBot", scopes=[])
+    with caplog.at_level(logging.WARNING, logger="agentsudo"):
+        _log_action("access_granted", agent, "read:db", "load", True, level=logging.DEBUG)
+    assert not caplog.records
+
+def test_session_events_logged_at_info(caplog):
+    import json
+    import logging
+    agent = Agent(name="SessionBot", scopes=[], session_ttl=60)
+    with caplog.at_level(logging.WARNING, logger="agentsudo"):
+        with agent.start_session():
+            pass
+    assert caplog.records == []
+    with caplog.at_level(logging.INFO, logger="agentsudo"):
+        with agent.start_session():
+            pass
+    events = [json.loads(r.getMessage()) for r in caplog.records]
+    assert events == [
+        {"event": "session_start", "agent_name": "SessionBot", "expires_in_seconds": 60},
+        {"event": "session_end", "agent_name": "SessionBot"},
+    ]
+
+def test_package_import_defers_slack():
+    import subprocess
+    import sys
+    code = (
+        "import sys, agentsudo\n"
+        "assert 'agentsudo.slack' not in sys.modules\n"
+        "assert 'agentsudo._http' not in sys.modules\n"
+        "from agentsudo import SlackApproval\n"
+        "assert agentsudo.SlackApproval is SlackApproval\n"
+        "assert 'create_slack_approval' in dir(agentsudo)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
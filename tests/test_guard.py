@@ -32,6 +32,12 @@ def test_authorized_access(read_agent):
     with read_agent.start_session():
         assert read_database() == "data"
 
+def test_expired_session_raises_error():
+    agent = Agent(name="StaleBot", scopes=["read:db"], session_ttl=-1)
+    with agent.start_session():
+        with pytest.raises(PermissionDeniedError, match="session expired"):
+            read_database()
+
 def test_denied_access(read_agent):
     with read_agent.start_session():
         with pytest.raises(PermissionDeniedError, match="missing required scope"):
@@ -42,6 +48,18 @@ def test_audit_mode_allows_execution(read_agent):
     with read_agent.start_session():
         assert write_audit_mode() == "written_audit"
 
+def test_denial_message_lists_agent_scopes(read_agent):
+    # Built only on the raising path, but still complete when raised
+    with read_agent.start_session():
+        with pytest.raises(PermissionDeniedError, match=r"Agent has: \['read:db'\]"):
+            write_database()
+
+def test_audit_mode_logs_violation_without_denial(read_agent, caplog):
+    with read_agent.start_session():
+        write_audit_mode()
+    assert '"action": "audit_violation"' in caplog.text
+    assert "missing required scope" not in caplog.text
+
 def test_callback_approval(read_agent):
     # Define a callback that approves everything
     def always_yes(agent, scope, context):
@@ -66,3 +84,48 @@ def test_callback_denial(read_agent):
     with read_agent.start_session():
         with pytest.raises(PermissionDeniedError, match="Action rejected by approval policy"):
             write_callback()
+
+def test_async_function_with_async_callback(read_agent):
+    import asyncio
+
+    async def approve_later(agent, scope, context):
+        await asyncio.sleep(0)
+        return context["function"] == "write_async"
+
+    @sudo(scope="write:db", on_deny=approve_later)
+    async def write_async():
+        return "approved_async"
+
+    async def main():
+        with read_agent.start_session():
+            return await write_async()
+
+    assert asyncio.run(main()) == "approved_async"
+
+def test_async_callback_rejected_for_sync_function():
+    async def approve(agent, scope, context):
+        return True
+
+    with pytest.raises(TypeError, match="requires an async function"):
+        @sudo(scope="write:db", on_deny=approve)
+        def write_sync():
+            return "nope"
+
+def test_awaitable_from_callable_object_is_not_approval(read_agent):
+    import warnings
+
+    class Approver:
+        async def __call__(self, agent, scope, context):
+            return True
+
+    ran = []
+
+    @sudo(scope="write:db", on_deny=Approver())
+    def write_sync():
+        ran.append(True)
+
+    with read_agent.start_session(), warnings.catch_warnings():
+        warnings.simplefilter("error")  # the coroutine must be closed, not leaked
+        with pytest.raises(TypeError, match="returned an awaitable"):
+            write_sync()
+    assert ran == []
@@ -49,3 +49,22 @@ def test_scoped_model_no_session():
         
     with pytest.raises(PermissionDeniedError, match="requires an active agent session"):
         SensitiveData(secret="fail")
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="Pydantic not installed")
+def test_scoped_model_denied_before_field_validation():
+    """Denied agents get PermissionDeniedError, not a field ValidationError."""
+    class SensitiveData(ScopedModel):
+        _required_scope = "read:secret"
+        secret: str
+
+    with Agent(name="Civilian", scopes=[]).start_session():
+        with pytest.raises(PermissionDeniedError):
+            SensitiveData(secret=123)  # Invalid field type
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="Pydantic not installed")
+def test_scoped_model_without_scope_needs_no_session():
+    class PublicData(ScopedModel):
+        value: int
+
+    assert PublicData(value=1).value == 1
+    assert PublicData.model_validate({"value": 2}).value == 2
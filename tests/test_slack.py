@@ -0,0 +1,134 @@
+import json
+
+import pytest
+import agentsudo.slack as slack
+from agentsudo import Agent
+from agentsudo.slack import SlackApproval
+
+
+class FakeCloud:
+    """Stands in for slack._send: creates an approval, then answers status polls."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def __call__(self, method, url, payload=None, headers=None, timeout=None):
+        self.requests.append((method, url, timeout))
+        if method == "POST":
+            return json.dumps({"id": "cloud-1"}).encode()
+        status = self.statuses.pop(0) if self.statuses else "pending"
+        return json.dumps({"status": status}).encode()
+
+    @property
+    def polls(self):
+        return [(url, timeout) for method, url, timeout in self.requests if method == "GET"]
+
+
+@pytest.fixture
+def cloud(monkeypatch):
+    fake = FakeCloud()
+    monkeypatch.setattr(slack, "_send", fake)
+    return fake
+
+
+def request(approval):
+    context = {"function": "delete_customer", "args": (), "kwargs": {}}
+    return approval.request_approval(Agent(name="Bot", scopes=[]), "delete:customer", context)
+
+
+def test_cloud_polls_without_long_polling_by_default(cloud):
+    cloud.statuses = ["pending", "pending", "approved"]
+    approval = SlackApproval(cloud_api_key="key", timeout=5, poll_interval=0.01)
+
+    assert request(approval) is True
+    assert len(cloud.polls) == 3
+    assert all(url.endswith("/approvals/cloud-1") for url, _ in cloud.polls)
+
+
+def test_cloud_long_poll_is_opt_in(cloud):
+    cloud.statuses = ["denied"]
+    approval = SlackApproval(cloud_api_key="key", timeout=5, cloud_long_poll=True)
+
+    assert request(approval) is False
+    [(url, timeout)] = cloud.polls
+    assert url.endswith("/approvals/cloud-1?wait=4")
+    assert timeout <= 5
+
+
+def test_status_requests_never_outlive_the_deadline(cloud):
+    approval = SlackApproval(cloud_api_key="key", timeout=0.2, poll_interval=0.01, cloud_long_poll=True)
+
+    assert request(approval) is False
+    assert cloud.polls
+    assert all(0 < timeout <= 0.2 for _, timeout in cloud.polls)
+
+
+def test_cloud_timeout_is_handled_the_same_sync_and_async(cloud):
+    import asyncio
+    approval = SlackApproval(
+        cloud_api_key="key", timeout=0.05, poll_interval=0.01, auto_deny_on_timeout=False
+    )
+    agent = Agent(name="Bot", scopes=[])
+    context = {"function": "delete_customer"}
+
+    assert approval.request_approval(agent, "delete:customer", context) is False
+    assert asyncio.run(approval.arequest_approval(agent, "delete:customer", context)) is False
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(slack, "_send", lambda *args, **kwargs: b'{"ok": true}')
+    return SlackApproval(bot_token="xoxb-test", channel="#approvals", timeout=5)
+
+
+def test_async_bot_approval_resumes_on_interaction(bot):
+    import asyncio
+
+    async def main():
+        task = asyncio.create_task(
+            bot.arequest_approval(Agent(name="Bot", scopes=[]), "delete:customer", {})
+        )
+        while not bot._pending_approvals:
+            await asyncio.sleep(0.001)
+        [approval_id] = bot._pending_approvals
+        assert bot.approve(approval_id, user="alice")
+        return await task
+
+    assert asyncio.run(main()) is True
+    assert bot._pending_approvals == {}
+
+
+def test_cancelled_async_approval_is_forgotten(bot):
+    import asyncio
+
+    async def main():
+        task = asyncio.create_task(
+            bot.arequest_approval(Agent(name="Bot", scopes=[]), "delete:customer", {})
+        )
+        while not bot._pending_approvals:
+            await asyncio.sleep(0.001)
+        [approval_id] = bot._pending_approvals
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return approval_id
+
+    approval_id = asyncio.run(main())
+    assert bot._pending_approvals == {}
+    assert bot.approve(approval_id) is False
+
+
+def test_credentials_assigned_after_construction_are_sent(monkeypatch):
+    monkeypatch.delenv("AGENTSUDO_API_KEY", raising=False)
+    sent = []
+    def send(method, url, payload=None, headers=None, timeout=None):
+        sent.append(headers["Authorization"])
+        return b'{"ok": false, "error": "test"}'
+    monkeypatch.setattr(slack, "_send", send)
+
+    approval = SlackApproval(channel="#approvals", timeout=1)
+    approval.bot_token = "xoxb-late"
+    request(approval)
+
+    assert sent == ["Bearer xoxb-late"]